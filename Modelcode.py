@@ -1,36 +1,15 @@
 import os
+import argparse
 import warnings
 warnings.filterwarnings("ignore")
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime, timedelta
-from sklearn.model_selection import train_test_split, RandomizedSearchCV, cross_val_score
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, top_k_accuracy_score
-import joblib
-import json
-try:
-    import xgboost as xgb
-    XGBOOST_AVAILABLE = True
-except Exception:
-    XGBOOST_AVAILABLE = False
+from modules.model_engines import ENGINES, available_engines
+from modules.training.incremental import append_field_samples, known_labels, run_incremental
+from modules.training.pipeline import FEATURES, STAGES, run_pipeline
 
+DATA_DIR = "data"
 CROP_CSV = os.path.join(DATA_DIR, "crop_recommendation.csv")
-WEATHER_CSV = os.path.join(DATA_DIR, "weather_data.csv")
-MANDI_CSV = os.path.join(DATA_DIR, "mandi_prices.csv")
-
-OUTPUT_MODEL = "crop_model.pkl"
-OUTPUT_SCALER = "scaler.pkl"
-
-print("Loading datasets...")
-crop_df = pd.read_csv(CROP_CSV)
-print(f"crop_recommendation.csv: {crop_df.shape}")
-
-weather_df = pd.read_csv(WEATHER_CSV) if os.path.exists(WEATHER_CSV) else None
-mandi_df = pd.read_csv(MANDI_CSV) if os.path.exists(MANDI_CSV) else None
 
 crop_descriptions = {
     "Wheat": "Wheat is a cereal grain grown worldwide. Requires well-drained soil and moderate rainfall. Harvest in 3-4 months. Ideal for temperate climates.",
@@ -51,72 +30,68 @@ crop_descriptions = {
     "Millet": "Millet is a drought-resistant cereal grown in dry regions. Requires minimal water and grows fast. Harvest in 3-4 months."
 }
 
-print("Preparing features and labels...")
-
-expected_features = ["N", "P", "K", "temperature", "humidity", "ph", "rainfall"]
-X = crop_df[expected_features].copy()
-y = crop_df['label'].astype(str).copy()
-
-X = X.fillna(X.median())
-
-le = LabelEncoder()
-y_enc = le.fit_transform(y)
-
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-joblib.dump(scaler, OUTPUT_SCALER)
-print(f"Scaler saved to {OUTPUT_SCALER}")
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X_scaled, y_enc, test_size=0.2, random_state=42, stratify=y_enc)
-
-print("Training Random Forest...")
-rf = RandomForestClassifier(random_state=42, n_jobs=-1)
-param_dist = {
-    "n_estimators": [100, 200, 300, 500],
-    "max_depth": [None, 6, 10, 20, 30],
-    "min_samples_split": [2, 5, 10],
-    "min_samples_leaf": [1, 2, 4],
-    "bootstrap": [True, False]
-}
-
-rs = RandomizedSearchCV(rf, param_distributions=param_dist, n_iter=30,
-                        scoring='accuracy', cv=4, verbose=1, random_state=42, n_jobs=-1)
-rs.fit(X_train, y_train)
-
-best_rf = rs.best_estimator_
-joblib.dump(best_rf, OUTPUT_MODEL)
-print(f"Random Forest model saved to {OUTPUT_MODEL}")
-
-y_pred = best_rf.predict(X_test)
-print("Test Accuracy:", accuracy_score(y_test, y_pred))
-print(classification_report(y_test, y_pred, target_names=le.classes_))
-
-cm = confusion_matrix(y_test, y_pred)
-plt.figure(figsize=(10,8))
-sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', xticklabels=le.classes_, yticklabels=le.classes_)
-plt.title("Confusion Matrix")
-plt.tight_layout()
-plt.savefig("confusion_matrix.png")
-plt.close()
-
-def predict_crop(input_dict):
+def predict_crop(input_dict, model, scaler, labels):
     
-    x = np.array([input_dict[f] for f in expected_features]).reshape(1, -1)
+    x = np.array([input_dict[f] for f in FEATURES]).reshape(1, -1)
     x_scaled = scaler.transform(x)
-    pred_idx = best_rf.predict(x_scaled)[0]
-    pred_label = le.inverse_transform([pred_idx])[0]
+    probs = model.predict_proba(x_scaled)[0]
+    pred_label = labels[int(model.classes_[np.argmax(probs)])]
     
-    top3 = []
-    if hasattr(best_rf, "predict_proba"):
-        probs = best_rf.predict_proba(x_scaled)[0]
-        top_idx = np.argsort(probs)[::-1][:3]
-        top3 = [(le.inverse_transform([i])[0], float(probs[i])) for i in top_idx]
+    top_idx = np.argsort(probs)[::-1][:3]
+    top3 = [(labels[int(model.classes_[i])], float(probs[i])) for i in top_idx]
         
-    desc = crop_descriptions.get(pred_label, "No description available.")
+    desc = crop_descriptions.get(pred_label.capitalize(), "No description available.")
     return {"crop": pred_label, "description": desc, "top3": top3}
 
-median_input = X.median().to_dict()
-demo = predict_crop(median_input)
-print("\nDemo prediction with median values:")
-print(demo)
\ No newline at end of file
+def main():
+    parser = argparse.ArgumentParser(description="CropVanta crop model training pipeline (load -> prepare -> search -> evaluate -> export).")
+    parser.add_argument("--data", nargs="+", default=[CROP_CSV], help="Training CSV file(s) with N,P,K,temperature,humidity,ph,rainfall,label.")
+    parser.add_argument("--engine", choices=list(ENGINES), default="random_forest",
+                        help=f"Model family to train (installed: {', '.join(available_engines())}).")
+    parser.add_argument("--search", choices=["halving", "random"], default="halving",
+                        help="Successive-halving (default) or exhaustive randomized search.")
+    parser.add_argument("--n-iter", type=int, default=30, help="Candidates sampled from the parameter grid.")
+    parser.add_argument("--cv", type=int, default=4)
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--stop-after", choices=STAGES, default="export")
+    parser.add_argument("--force", action="store_true", help="Ignore cached stage outputs and rerun everything.")
+    parser.add_argument("--plot", action="store_true", help="Save models/confusion_matrix.png (needs matplotlib + seaborn).")
+    parser.add_argument("--activate", action="store_true",
+                        help="Make the new registry version live; running dashboards pick it up without a restart.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Grow the current forest with unabsorbed field samples instead of a full retrain.")
+    parser.add_argument("--add-samples", help="CSV of newly labelled field outcomes to append to the training store first.")
+    parser.add_argument("--new-trees", type=int, default=50, help="Trees added per incremental run.")
+    parser.add_argument("--replay-per-class", type=int, default=10, help="Replay rows per crop mixed into an incremental run.")
+    parser.add_argument("--max-trees", type=int,
+                        help="Forest size cap for incremental runs; the oldest trees are retired "
+                             "(default: the cap already recorded, else the current size).")
+    args = parser.parse_args()
+
+    if args.incremental:
+        if args.add_samples:
+            append_field_samples(pd.read_csv(args.add_samples), known_labels(args.data))
+        result = run_incremental(n_new_trees=args.new_trees, replay_per_class=args.replay_per_class,
+                                 random_state=args.seed, base_data=args.data, activate=args.activate,
+                                 max_trees=args.max_trees)
+        print(result)
+        return
+
+    results = run_pipeline(args.data, engine=args.engine, strategy=args.search, n_iter=args.n_iter, cv=args.cv,
+                           test_size=args.test_size, random_state=args.seed, stop_after=args.stop_after,
+                           force=args.force, plot=args.plot, activate=args.activate)
+
+    for stage in STAGES:
+        if stage in results:
+            print(f"{stage:>8}: {results[stage]}")
+
+    if "report" in results:
+        print(results["report"])
+        artifacts = results["_artifacts"]
+        demo = predict_crop(artifacts["median_input"], artifacts["model"], artifacts["scaler"], artifacts["labels"])
+        print("\nDemo prediction with median values:")
+        print(demo)
+
+if __name__ == "__main__":
+    main()
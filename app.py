@@ -1,9 +1,7 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
 import os
-import requests
 import base64  
 import random
 from datetime import datetime
@@ -25,8 +23,13 @@ from modules.ui_components import (
     render_feedback_post
 )
 from modules.crop_advisor import CropAdvisor
+from modules.fertilizer_advisor import FertilizerAdvisor
+from modules.drift_monitor import get_drift_monitor
+from modules.model_registry import ModelRegistry, RegistryWatcher, load_serving_bundle
 from modules.market_advisor import MarketAdvisor
 from modules.calandar_advisor import CalendarAdvisor
+from modules.weather_client import get_weather_client
+from modules.geocoding import get_gazetteer
 from modules.news_fetcher import PaperManager
 from modules import land_suitability, ai_chatbot
 from modules.language_manager import get_translations
@@ -180,11 +183,16 @@ for path in ["uploaded_papers", "data/feedback", "logs"]:
 @st.cache_resource
 def init_services():
     try:
-        scaler = joblib.load(settings.SCALER_PATH)
-        model = joblib.load(settings.MODEL_PATH)
-        logger.info("Resources loaded successfully.")
+        registry = ModelRegistry()
+        bundle = load_serving_bundle(registry)
+        advisor = CropAdvisor(bundle, drift_monitor=get_drift_monitor())
+        # Rolls out a newly activated registry version without a restart.
+        watcher = RegistryWatcher(registry, advisor.swap, current_version=bundle.version).start()
+        logger.info(f"Resources loaded successfully (model {bundle.version}).")
         return {
-            "advisor": CropAdvisor(model, scaler),
+            "advisor": advisor,
+            "fertilizer": FertilizerAdvisor(advisor),
+            "model_watcher": watcher,
             "market": MarketAdvisor(),
             "calendar": CalendarAdvisor(),
             "papers": PaperManager(upload_dir="uploaded_papers") 
@@ -198,11 +206,20 @@ if services is None:
     st.error("Critical system error. Please check model files.")
     st.stop()
 
+if st.session_state.get("user_role") == "admin":
+    with st.sidebar:
+        cache_stats = services["advisor"].cache_stats()
+        st.caption(
+            f"Prediction cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0%}), {cache_stats['size']}/{cache_stats['max_size']} entries"
+        )
+        st.caption(f"Serving model: {services['advisor'].bundle.version}")
+
 @st.cache_data(ttl=3600)
 def get_advanced_resources():
     try:
-        url = "https://api.open-meteo.com/v1/forecast?latitude=22.71&longitude=75.85&hourly=shortwave_radiation,soil_moisture_3_to_9cm&daily=et0_fao_evapotranspiration&timezone=auto"
-        res = requests.get(url).json()
+        res = get_weather_client().fetch(22.71, 75.85, hourly="shortwave_radiation,soil_moisture_3_to_9cm",
+                                         daily="et0_fao_evapotranspiration", timezone="auto")
         return {
             "sol": res['hourly']['shortwave_radiation'][0],
             "wat": res['daily']['et0_fao_evapotranspiration'][0],
@@ -215,10 +232,16 @@ resource_data = get_advanced_resources()
 s_sol = resource_data["sol"]
 s_wat = resource_data["wat"]
 s_moist = resource_data["mst"]
+# cache_resource hands back the same frame every rerun, so MarketAdvisor
+# builds its (commodity, state) index once per data load. A failed read
+# raises, which Streamlit does not cache, so the next rerun tries again.
+@st.cache_resource
+def read_market_data():
+    return pd.read_csv("data/mandi_prices.csv", encoding="utf-8")
+
 def load_market_data():
     try: 
-        df = pd.read_csv("data/mandi_prices.csv", encoding="utf-8")
-        return df
+        return read_market_data()
     except: 
         return pd.DataFrame()
 
@@ -377,6 +400,7 @@ with tabs[1]:
                 )
                 
                 st.session_state.last_result = services["advisor"].recommend_crop(v_input)
+                st.session_state.last_input = v_input
                 
                 if st.session_state.last_result.get("status") == "success":
                     st.session_state.trigger_balloons = True
@@ -402,6 +426,8 @@ with tabs[1]:
                     label=T.get('conf_score','Confidence'),
                     value=f"{res.get('confidence_score',0)}%"
                 )
+                st.caption("Scored at lab-report precision: N, P, K, humidity and rainfall to 1, "
+                           "temperature to 0.1, pH to 0.05.")
 
             st.divider()
 
@@ -410,12 +436,60 @@ with tabs[1]:
             with c1:
                 st.markdown("### AI Insights")
                 st.write(res.get('description','No details available.'))
+                if res.get("research_status") == "pending":
+                    research = services["advisor"].get_research(res.get('crop_name', ''))
+                    if research:
+                        res["description"] = research
+                        res["research_status"] = "ready"
+                        st.rerun()
+                    st.caption("Fetching latest web research in the background...")
 
             with c2:
-                st.markdown("### Smart Farmer Advice")
-                st.write(f"• Optimal pH detected: {ph}")
-                st.write(f"• Recommended Fertilizer: Based on N={N}")
-                st.write(f"• Watering schedule: Based on {rain}mm rain")
+                st.markdown("### Why this crop")
+                explanation = res.get("explanation")
+                if explanation:
+                    contrib = pd.Series(explanation["contributions"]).sort_values(key=abs, ascending=False)
+                    st.bar_chart(contrib * 100)
+                    for feature, value in contrib.head(3).items():
+                        direction = "supports" if value > 0 else "works against"
+                        st.write(f"• {feature.capitalize()} {direction} {res.get('crop_name')} ({value * 100:+.1f} pts)")
+                    st.caption(f"Baseline {explanation['bias'] * 100:.1f}% + feature contributions = "
+                               f"{res.get('confidence_score', 0)}% confidence.")
+                else:
+                    st.write(f"• Optimal pH detected: {ph}")
+                    st.write(f"• Recommended Fertilizer: Based on N={N}")
+                    st.write(f"• Watering schedule: Based on {rain}mm rain")
+
+            with st.expander("Fertilizer What-If: reach a target crop"):
+                crop_names = services["advisor"].bundle.label_names()
+                w1, w2 = st.columns(2)
+                with w1:
+                    target_crop = st.selectbox("Target crop", sorted(crop_names), key="whatif_crop")
+                with w2:
+                    target_prob = st.slider("Minimum probability", 0.0, 1.0, 0.0, 0.05, key="whatif_prob")
+                if st.button("Find cheapest adjustment") and st.session_state.get("last_input"):
+                    plan = services["fertilizer"].sweep(st.session_state.last_input, target_crop, target_prob)
+                    if plan.get("status") != "success":
+                        st.error(plan.get("message", "What-if analysis failed."))
+                    elif plan["found"]:
+                        changes = {k: v for k, v in plan["adjustment"].items() if v}
+                        st.success(
+                            f"{plan['target_crop']} becomes the top pick ({plan['probability']:.0%}) with: "
+                            + (", ".join(f"{k} {v:+g}" for k, v in changes.items()) or "no change")
+                            + f" (approx. Rs {plan['cost']:,.0f}/ha)"
+                        )
+                        if plan["alternatives"]:
+                            st.dataframe(pd.DataFrame([{**a["adjustment"], "cost_rs_ha": a["cost"],
+                                                        "probability": a["probability"]}
+                                                       for a in plan["alternatives"]]), use_container_width=True)
+                    else:
+                        closest = plan["closest"]
+                        st.warning(
+                            f"No adjustment in the sweep makes {plan['target_crop']} the top pick. "
+                            f"Closest: {closest['probability']:.0%} with {closest['adjustment']} "
+                            f"(top pick there: {closest['top_crop']})."
+                        )
+                    st.caption(f"{plan.get('grid_size', 0):,} candidate soil profiles scored in one pass.")
 
 
 with tabs[3]:
@@ -434,7 +508,17 @@ with tabs[3]:
                 st.dataframe(market_df.head(10), use_container_width=True)
     with c2:
         st.markdown("### Crop Calendar")
-        if services["calendar"]: st.dataframe(services["calendar"].get_calendar_df(), use_container_width=True)
+        if services["calendar"]:
+            st.dataframe(services["calendar"].get_calendar_df(), use_container_width=True)
+            climate_place = st.text_input("Sowing-season climate near", "Indore")
+            gazetteer = get_gazetteer()
+            coords = gazetteer.lookup(climate_place) if gazetteer else None
+            if coords:
+                sowing_climate = services["calendar"].get_sowing_climate(*coords)
+                if not sowing_climate.empty:
+                    st.dataframe(sowing_climate, use_container_width=True)
+            elif climate_place:
+                st.caption("Place not in the offline gazetteer; try a district or state name.")
 with tabs[6]:
 
     st.markdown(f"""
@@ -1,15 +1,30 @@
 from langchain_community.tools import DuckDuckGoSearchRun
+from modules.core.config import settings
 from modules.core.logger import get_logger
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+import json
+import os
 import random
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes still merge, without the cross-process lock
+    fcntl = None
 
 logger = get_logger("AI_Researcher")
 
+FALLBACK_MARKER = "*#*"
+
 def perform_crop_research(crop_name: str) -> str:
     logger.info(f"Starting autonomous research for: {crop_name}")
     
     raw_data = fetch_agri_trends(crop_name)
     
-    if "*#*" in raw_data or "slow" in raw_data:
+    if FALLBACK_MARKER in raw_data or "slow" in raw_data:
         return raw_data 
 
     summary = f"""
@@ -38,4 +53,125 @@ def fetch_agri_trends(query: str):
         return results
     except Exception as e:
         logger.error(f"Search failed: {str(e)}")
-        return f"*#* **Note:** Real-time web search for {query} is temporarily slow. Our internal 2026 database suggests maintaining optimal NPK levels, monitoring soil moisture, and checking for local climate-resilient seed varieties."
\ No newline at end of file
+        return f"{FALLBACK_MARKER} **Note:** Real-time web search for {query} is temporarily slow. Our internal 2026 database suggests maintaining optimal NPK levels, monitoring soil moisture, and checking for local climate-resilient seed varieties."
+
+class ResearchCache:
+    """
+    Per-crop research reports with a TTL, kept in memory and mirrored to a JSON
+    file so every session and process shares them. Misses are fetched by a
+    small background pool; callers never block on the web search.
+    """
+
+    def __init__(self, cache_path: str = settings.RESEARCH_CACHE_PATH,
+                 ttl_seconds: int = settings.RESEARCH_TTL_SECONDS,
+                 max_workers: int = settings.RESEARCH_WORKERS):
+        self.cache_path = Path(cache_path)
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Dict] = {}
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._disk_mtime = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crop-research")
+        self._load_from_disk()
+
+    def _is_fresh(self, entry: Optional[Dict]) -> bool:
+        return bool(entry) and (time.time() - entry["fetched_at"]) < self.ttl_seconds
+
+    def _read_disk(self) -> Dict[str, Dict]:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Research cache unreadable, ignoring: {e}")
+            return {}
+
+    def _merge(self, on_disk: Dict[str, Dict]):
+        """Keeps the newest report per crop; call with `_lock` held."""
+        for crop, entry in on_disk.items():
+            current = self._entries.get(crop)
+            if not current or entry.get("fetched_at", 0) > current["fetched_at"]:
+                self._entries[crop] = entry
+
+    def _load_from_disk(self):
+        try:
+            mtime = self.cache_path.stat().st_mtime
+        except OSError:
+            return
+        if mtime <= self._disk_mtime:
+            return
+        on_disk = self._read_disk()
+        with self._lock:
+            self._merge(on_disk)
+            self._disk_mtime = mtime
+
+    def _persist(self):
+        """
+        Read-merge-write under an exclusive lock on a sidecar file, so reports
+        another process wrote since our last load are kept, not overwritten.
+        """
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_path.with_suffix(".lock"), "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            on_disk = self._read_disk()
+            with self._lock:
+                self._merge(on_disk)
+                snapshot = dict(self._entries)
+            tmp_path = self.cache_path.with_suffix(f".{os.getpid()}-{threading.get_ident()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.cache_path)
+
+    def _entry(self, crop_name: str) -> Optional[Dict]:
+        with self._lock:
+            return self._entries.get(crop_name)
+
+    def get(self, crop_name: str) -> Optional[str]:
+        """Returns the cached report if it is still within the TTL."""
+        entry = self._entry(crop_name)
+        if not self._is_fresh(entry):
+            self._load_from_disk()
+            entry = self._entry(crop_name)
+        return entry["report"] if self._is_fresh(entry) else None
+
+    def request(self, crop_name: str) -> Optional[str]:
+        """Returns a fresh report, or schedules a background fetch and returns None."""
+        report = self.get(crop_name)
+        if report is not None:
+            return report
+        with self._lock:
+            if crop_name in self._in_flight:
+                return None
+            self._in_flight.add(crop_name)
+        self._executor.submit(self._refresh, crop_name)
+        return None
+
+    def _refresh(self, crop_name: str):
+        try:
+            report = perform_crop_research(crop_name)
+            if not report or FALLBACK_MARKER in report:
+                logger.warning(f"Research unavailable for {crop_name}, will retry on next request")
+                return
+            with self._lock:
+                self._entries[crop_name] = {"report": report, "fetched_at": time.time()}
+            self._persist()
+            logger.info(f"Research cached for: {crop_name}")
+        except Exception as e:
+            logger.error(f"Background research failed for {crop_name}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(crop_name)
+
+_research_cache: Optional[ResearchCache] = None
+_research_cache_lock = threading.Lock()
+
+def get_research_cache() -> ResearchCache:
+    """Process-wide cache shared by all Streamlit sessions."""
+    global _research_cache
+    if _research_cache is None:
+        with _research_cache_lock:
+            if _research_cache is None:
+                _research_cache = ResearchCache()
+    return _research_cache
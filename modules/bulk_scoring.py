@@ -0,0 +1,165 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from modules.core.config import settings
+from modules.core.logger import get_logger
+from modules.crop_advisor import CropAdvisor, feature_matrix, input_bounds
+from modules.model_registry import ModelBundle, ModelRegistry, load_legacy_bundle, load_serving_bundle
+from modules.prediction_cache import PredictionCache, quantize_batch
+
+logger = get_logger("Bulk_Scoring")
+
+RESULT_COLUMNS = ["status", "crop_name", "label_id", "confidence_score", "is_reliable", "top_k", "model_version"]
+
+# One advisor per worker process, loaded once by the pool initializer.
+_WORKER_ADVISOR: Optional[CropAdvisor] = None
+
+def _load_version(registry_root: str, version: str) -> ModelBundle:
+    """Exactly `version`, not whatever ACTIVE names when the worker starts."""
+    return load_legacy_bundle() if version == "legacy" else ModelRegistry(registry_root).load(version)
+
+def _init_worker(registry_root: str, version: str):
+    global _WORKER_ADVISOR
+    _WORKER_ADVISOR = CropAdvisor(_load_version(registry_root, version), cache=PredictionCache(max_size=0))
+
+def score_chunk(chunk: pd.DataFrame, advisor: CropAdvisor, top_k: int = 3) -> pd.DataFrame:
+    """
+    Scores one chunk the way the Crop AI tab does: rows outside the CropInput
+    bounds are marked invalid, the rest are snapped to the measurement grid
+    and scored in a single predict_proba pass. Input columns named like a
+    result column (a re-scored output file) are replaced, not duplicated.
+    """
+    features = feature_matrix(chunk)
+    bounds = input_bounds()
+    valid = np.isfinite(features).all(axis=1) & ((features >= bounds[:, 0]) & (features <= bounds[:, 1])).all(axis=1)
+
+    result = pd.DataFrame(index=chunk.index, columns=RESULT_COLUMNS, dtype=object)
+    result["status"] = np.where(valid, "ok", "invalid")
+    if valid.any():
+        scored = advisor.recommend_many(quantize_batch(features[valid]), top_k=top_k)
+        scored["top_k"] = [";".join(f"{name}:{p}" for name, p in row) for row in scored["top_k"]]
+        scored["model_version"] = advisor.bundle.version
+        result.loc[valid, scored.columns] = scored.to_numpy()
+    return pd.concat([chunk.drop(columns=chunk.columns.intersection(RESULT_COLUMNS)), result], axis=1)
+
+def _score_in_worker(chunk: pd.DataFrame, top_k: int) -> pd.DataFrame:
+    return score_chunk(chunk, _WORKER_ADVISOR, top_k)
+
+class BulkScoringJob:
+    """
+    Streams `input_path` in chunks through a process pool and appends the
+    scored rows to `output_path` in input order. After every written chunk a
+    checkpoint records the rows done and the output size, so a killed job
+    resumes from the last complete chunk. At most `2 * workers` chunks are
+    in flight, which keeps memory flat regardless of the input size.
+    """
+
+    def __init__(self, input_path: str, output_path: str, chunk_size: int = settings.BULK_CHUNK_ROWS,
+                 workers: int = settings.BULK_WORKERS, top_k: int = 3,
+                 registry_root: str = settings.MODEL_REGISTRY_DIR):
+        self.input_path = Path(input_path)
+        self.output_path = Path(output_path)
+        self.checkpoint_path = self.output_path.with_name(self.output_path.name + ".checkpoint.json")
+        self.chunk_size = chunk_size
+        self.workers = max(1, workers)
+        self.top_k = top_k
+        self.registry_root = registry_root
+
+    def _job_identity(self, model_version: str) -> Dict[str, Any]:
+        stat = self.input_path.stat()
+        return {"input": str(self.input_path), "input_size": stat.st_size, "input_mtime": stat.st_mtime,
+                "chunk_size": self.chunk_size, "top_k": self.top_k, "model_version": model_version}
+
+    def load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        if not self.checkpoint_path.exists():
+            return None
+        with open(self.checkpoint_path, "r") as f:
+            return json.load(f)
+
+    def _write_checkpoint(self, state: Dict[str, Any]):
+        tmp_path = self.checkpoint_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _resume_state(self, identity: Dict[str, Any], restart: bool) -> Dict[str, Any]:
+        state = None if restart else self.load_checkpoint()
+        if state is not None and state.get("job") != identity:
+            raise ValueError(f"{self.checkpoint_path} belongs to a different input or model version; "
+                             f"rerun with restart to score from scratch")
+        if state is None or not self.output_path.exists():
+            self.output_path.parent.mkdir(parents=True, exist_ok=True)
+            open(self.output_path, "wb").close()
+            return {"job": identity, "chunks_done": 0, "rows_done": 0, "output_bytes": 0, "done": False}
+        # Drop anything written after the last checkpoint (a chunk cut off by the kill).
+        with open(self.output_path, "r+b") as f:
+            f.truncate(state["output_bytes"])
+        logger.info(f"Resuming {self.input_path} at chunk {state['chunks_done']} ({state['rows_done']} rows done)")
+        return state
+
+    def run(self, restart: bool = False,
+            progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        # Resolved once here; every worker loads this version, so the job
+        # never mixes models if ACTIVE moves while it runs.
+        version = load_serving_bundle(ModelRegistry(self.registry_root)).version
+        state = self._resume_state(self._job_identity(version), restart)
+        if state["done"]:
+            return {"status": "success", **state}
+
+        replaced = pd.read_csv(self.input_path, nrows=0).columns.intersection(RESULT_COLUMNS)
+        if len(replaced):
+            logger.warning(f"{self.input_path} already has result columns {list(replaced)}; they will be overwritten")
+
+        start = time.perf_counter()
+        rows_this_run = 0
+        reader = pd.read_csv(self.input_path, chunksize=self.chunk_size)
+        # Chunk boundaries are fixed by chunk_size (part of the job identity),
+        # so skip the chunks already written; each is parsed and dropped, which
+        # keeps memory flat where skiprows would hold every skipped row index.
+        for _ in range(state["chunks_done"]):
+            next(reader, None)
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.registry_root, version)) as pool, \
+                open(self.output_path, "ab") as out:
+            in_flight = deque()
+            exhausted = False
+            while in_flight or not exhausted:
+                while not exhausted and len(in_flight) < 2 * self.workers:
+                    chunk = next(reader, None)
+                    if chunk is None:
+                        exhausted = True
+                    else:
+                        in_flight.append(pool.submit(_score_in_worker, chunk, self.top_k))
+                if not in_flight:
+                    break
+
+                scored = in_flight.popleft().result()
+                scored.to_csv(out, header=state["output_bytes"] == 0, index=False)
+                out.flush()
+                os.fsync(out.fileno())
+                rows_this_run += len(scored)
+                state.update(chunks_done=state["chunks_done"] + 1, rows_done=state["rows_done"] + len(scored),
+                             output_bytes=out.tell())
+                self._write_checkpoint(state)
+                if progress is not None:
+                    progress(state)
+
+        state["done"] = True
+        self._write_checkpoint(state)
+        elapsed = time.perf_counter() - start
+        logger.info(f"Scored {rows_this_run} rows of {self.input_path} in {elapsed:.1f}s "
+                    f"({state['rows_done']} total) -> {self.output_path}")
+        return {"status": "success", "rows_this_run": rows_this_run, "seconds": round(elapsed, 2), **state}
+
+def count_rows(path: str) -> int:
+    """Data rows in a CSV (for progress bars), counted without parsing it."""
+    with open(path, "rb") as f:
+        return max(0, sum(block.count(b"\n") for block in iter(lambda: f.read(1 << 20), b"")) - 1)
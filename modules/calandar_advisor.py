@@ -1,9 +1,11 @@
+import numpy as np
 import pandas as pd
-import requests
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from modules.core.logger import get_logger
 from modules.core.config import settings
+from modules.climatology import get_climatology
+from modules.weather_client import get_weather_client
 
 logger = get_logger(__name__)
 
@@ -29,26 +31,58 @@ class CalendarAdvisor:
         ]
         return recommended
 
+    def get_sowing_climate(self, lat: float, lon: float) -> pd.DataFrame:
+        """
+        Long-run temperature and rainfall over each crop's sowing window,
+        from the local climatology store (one NASA POWER call the first
+        time a grid cell is asked for, none afterwards).
+        """
+        store = get_climatology()
+        normals = store.normals(lat, lon) if store else None
+        if normals is None:
+            return pd.DataFrame()
+
+        rows = []
+        for item in self.calendar_data:
+            start, end = item["Sowing Start"], item["Sowing End"]
+            months = list(range(start, end + 1)) if start <= end else list(range(start, 13)) + list(range(1, end + 1))
+            rows.append({
+                "Crop": item["Crop"],
+                "Sowing Period": item["Sowing Period"],
+                "Normal Temp (°C)": round(float(np.nanmean([normals["temp"][m - 1] for m in months])), 1),
+                "Normal Rain (mm/month)": round(float(np.nanmean([normals["rain"][m - 1] for m in months])), 1),
+            })
+        return pd.DataFrame(rows)
+
     def fetch_rain_forecast(self, lat: float, lon: float) -> Dict:
         """
         Fetches weather data using professional error handling.
         """
+        return self.fetch_rain_forecasts([(lat, lon)])[0]
+
+    def fetch_rain_forecasts(self, coords: List[Tuple[float, float]]) -> List[Dict]:
+        """Today's rain for many locations in a few multi-location requests."""
         try:
-            url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&daily=precipitation_sum&timezone=auto"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            rain_mm = data['daily']['precipitation_sum'][0]
-            
-            return {
-                "status": "success",
-                "rain_mm": rain_mm,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M")
-            }
+            payloads = get_weather_client().fetch_many(coords, daily="precipitation_sum", timezone="auto")
         except Exception as e:
             logger.error(f"Weather API Error: {e}")
-            return {"status": "error", "message": str(e)}
+            return [{"status": "error", "message": str(e)} for _ in coords]
+
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+        results = []
+        for data in payloads:
+            try:
+                if data is None:
+                    raise ValueError("no forecast returned")
+                results.append({
+                    "status": "success",
+                    "rain_mm": data['daily']['precipitation_sum'][0],
+                    "timestamp": timestamp
+                })
+            except Exception as e:
+                logger.error(f"Weather API Error: {e}")
+                results.append({"status": "error", "message": str(e)})
+        return results
 
     def get_actionable_advice(self, rain_mm: float) -> str:
         """Returns professional agricultural advice based on rain levels."""
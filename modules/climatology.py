@@ -0,0 +1,220 @@
+import calendar
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from modules.core.config import settings
+from modules.core.http_client import get_http_client
+from modules.core.logger import get_logger
+from modules.geocoding import get_gazetteer
+
+logger = get_logger("Climatology")
+
+NASA_CLIMATOLOGY_URL = "https://power.larc.nasa.gov/api/temporal/climatology/point"
+MONTHS = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
+# Days per month of a non-leap year, to turn mm/day normals into monthly totals.
+MONTH_DAYS = np.array([calendar.monthrange(2001, m)[1] for m in range(1, 13)], dtype=np.float32)
+
+TEMP, RAIN = 0, 1
+
+class ClimatologyStore:
+    """
+    Monthly temperature (deg C) and rainfall (mm/month) normals on a regular
+    lat/lon grid over India, kept in a memory-mapped .npy of shape
+    (n_lat, n_lon, 12, 2). Unfilled cells are NaN; a cell is filled once
+    from NASA POWER's climatology endpoint (or seeded from local data) and
+    then served from disk by every process.
+    """
+
+    def __init__(self, path: str = settings.CLIMATOLOGY_PATH,
+                 bounds: Tuple[float, float, float, float] = settings.CLIMATOLOGY_BOUNDS,
+                 resolution: float = settings.CLIMATOLOGY_RESOLUTION):
+        self.path = Path(path)
+        self.south, self.west, self.north, self.east = bounds
+        self.resolution = resolution
+        self.n_lat = int(round((self.north - self.south) / resolution)) + 1
+        self.n_lon = int(round((self.east - self.west) / resolution)) + 1
+        self._lock = threading.Lock()
+        self.grid = self._open()
+
+    def _open(self) -> np.memmap:
+        shape = (self.n_lat, self.n_lon, 12, 2)
+        if self.path.exists():
+            grid = np.load(self.path, mmap_mode="r+")
+            if grid.shape == shape:
+                return grid
+            logger.warning(f"Climatology grid {grid.shape} does not match {shape}; rebuilding")
+            del grid
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        empty = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=shape)
+        empty[:] = np.nan
+        empty.flush()
+        del empty
+        os.replace(tmp, self.path)
+        return np.load(self.path, mmap_mode="r+")
+
+    def cell_index(self, lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearest grid cell for scalar or array coordinates, clipped to the grid."""
+        i = np.clip(np.rint((np.asarray(lat, dtype=float) - self.south) / self.resolution), 0, self.n_lat - 1)
+        j = np.clip(np.rint((np.asarray(lon, dtype=float) - self.west) / self.resolution), 0, self.n_lon - 1)
+        return i.astype(int), j.astype(int)
+
+    def cell_center(self, i: int, j: int) -> Tuple[float, float]:
+        return round(self.south + i * self.resolution, 4), round(self.west + j * self.resolution, 4)
+
+    def contains(self, lat: float, lon: float) -> bool:
+        return self.south <= lat <= self.north and self.west <= lon <= self.east
+
+    def lookup(self, lat, lon, method: str = "nearest") -> np.ndarray:
+        """
+        Normals at scalar or array coordinates: shape (..., 12, 2) with
+        [..., month, TEMP/RAIN]. "bilinear" blends the four surrounding cells,
+        ignoring unfilled ones; NaN means no filled cell to answer from.
+        """
+        if method == "nearest":
+            i, j = self.cell_index(lat, lon)
+            return np.array(self.grid[i, j])
+        if method != "bilinear":
+            raise ValueError(f"Unknown lookup method: {method}")
+
+        y = np.clip((np.asarray(lat, dtype=float) - self.south) / self.resolution, 0, self.n_lat - 1)
+        x = np.clip((np.asarray(lon, dtype=float) - self.west) / self.resolution, 0, self.n_lon - 1)
+        i0, j0 = np.floor(y).astype(int), np.floor(x).astype(int)
+        i1, j1 = np.minimum(i0 + 1, self.n_lat - 1), np.minimum(j0 + 1, self.n_lon - 1)
+        fy, fx = (y - i0)[..., None, None], (x - j0)[..., None, None]
+
+        total = np.zeros(np.shape(y) + (12, 2))
+        weight = np.zeros_like(total)
+        for ci, cj, w in ((i0, j0, (1 - fy) * (1 - fx)), (i0, j1, (1 - fy) * fx),
+                          (i1, j0, fy * (1 - fx)), (i1, j1, fy * fx)):
+            values = np.asarray(self.grid[ci, cj], dtype=float)
+            filled = ~np.isnan(values)
+            total += np.where(filled, values * w, 0.0)
+            weight += np.where(filled, w, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(weight > 0, total / weight, np.nan)
+
+    def is_filled(self, lat: float, lon: float) -> bool:
+        i, j = self.cell_index(lat, lon)
+        return not np.isnan(self.grid[i, j]).any()
+
+    def fill(self, i: int, j: int, normals: np.ndarray, overwrite: bool = True):
+        """Writes a (12, 2) block of normals into cell (i, j) and flushes it to disk."""
+        normals = np.asarray(normals, dtype=np.float32)
+        with self._lock:
+            if overwrite:
+                self.grid[i, j] = normals
+            else:
+                current = self.grid[i, j]
+                self.grid[i, j] = np.where(np.isnan(current), normals, current)
+            self.grid.flush()
+
+    def fetch_nasa_power(self, i: int, j: int, deadline: Optional[float] = None) -> Optional[np.ndarray]:
+        """Monthly normals for a cell centre from NASA POWER's climatology endpoint."""
+        lat, lon = self.cell_center(i, j)
+        params = {"parameters": "T2M,PRECTOTCORR", "community": "AG",
+                  "latitude": lat, "longitude": lon, "format": "JSON"}
+        try:
+            response = get_http_client().get("nasa_power", NASA_CLIMATOLOGY_URL, deadline=deadline, params=params)
+            response.raise_for_status()
+            parameter = response.json()["properties"]["parameter"]
+            temp = np.array([parameter["T2M"][m] for m in MONTHS], dtype=np.float32)
+            rain_per_day = np.array([parameter["PRECTOTCORR"][m] for m in MONTHS], dtype=np.float32)
+        except Exception as e:
+            logger.error(f"NASA POWER climatology failed for {lat}, {lon}: {e}")
+            return None
+        # POWER marks missing values with -999.
+        temp[temp <= -999] = np.nan
+        rain_per_day[rain_per_day < 0] = np.nan
+        return np.stack([temp, rain_per_day * MONTH_DAYS], axis=-1)
+
+    def ensure(self, lat: float, lon: float, deadline: Optional[float] = None) -> bool:
+        """Fills the nearest cell from NASA POWER if it is empty; True if it is filled afterwards."""
+        if self.is_filled(lat, lon):
+            return True
+        if not self.contains(lat, lon):
+            return False
+        i, j = (int(v) for v in self.cell_index(lat, lon))
+        normals = self.fetch_nasa_power(i, j, deadline)
+        if normals is None:
+            return False
+        # Keep any month already seeded locally if POWER has a gap there.
+        self.fill(i, j, np.where(np.isnan(normals), self.grid[i, j], normals))
+        logger.info(f"Climatology cell {self.cell_center(i, j)} filled from NASA POWER")
+        return True
+
+    def normals(self, lat: float, lon: float, method: str = "nearest", fetch: bool = True,
+                deadline: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Twelve monthly temperature/rain normals for a location, filling its
+        cell from NASA POWER first when `fetch` is set (within `deadline`
+        seconds if given). None if no data.
+        """
+        if fetch:
+            self.ensure(lat, lon, deadline)
+        values = self.lookup(lat, lon, method=method).astype(float)
+        if np.isnan(values).all():
+            return None
+        return {
+            "temp": values[:, TEMP].round(2).tolist(),
+            "rain": values[:, RAIN].round(1).tolist(),
+            "cell": self.cell_center(*(int(v) for v in self.cell_index(lat, lon))),
+        }
+
+    def seed_from_weather_csv(self, path: str = "data/weather_data.csv") -> int:
+        """
+        Seeds empty months from daily station-style records. Rows are placed
+        at their state's centroid from the gazetteer (district names in the
+        file are placeholders); monthly rain is mean daily rain x days in month.
+        Returns the number of (cell, month) values written.
+        """
+        gazetteer = get_gazetteer()
+        if gazetteer is None:
+            return 0
+        df = pd.read_csv(path, parse_dates=["date"])
+        df["month"] = df["date"].dt.month
+        daily = df.groupby(["state", "month"])[["temperature", "rainfall"]].mean()
+
+        written = 0
+        for (state, month), row in daily.iterrows():
+            place = gazetteer.find(state)
+            if place is None or not self.contains(place["lat"], place["lon"]):
+                logger.warning(f"No gazetteer coordinates for {state}; skipping")
+                continue
+            i, j = (int(v) for v in self.cell_index(place["lat"], place["lon"]))
+            normals = np.full((12, 2), np.nan, dtype=np.float32)
+            normals[month - 1] = (row["temperature"], row["rainfall"] * MONTH_DAYS[month - 1])
+            if np.isnan(self.grid[i, j, month - 1]).all():
+                self.fill(i, j, normals, overwrite=False)
+                written += 1
+        logger.info(f"Seeded {written} monthly normals from {path}")
+        return written
+
+    def coverage(self) -> Dict[str, int]:
+        filled = ~np.isnan(self.grid[..., TEMP]).all(axis=-1)
+        return {"cells": self.n_lat * self.n_lon, "filled": int(filled.sum())}
+
+_climatology: Optional[ClimatologyStore] = None
+_climatology_lock = threading.Lock()
+
+def get_climatology() -> Optional[ClimatologyStore]:
+    """Process-wide store; seeded from data/weather_data.csv when first created."""
+    global _climatology
+    if _climatology is None:
+        with _climatology_lock:
+            if _climatology is None:
+                try:
+                    created = not Path(settings.CLIMATOLOGY_PATH).exists()
+                    store = ClimatologyStore()
+                    if created and Path("data/weather_data.csv").exists():
+                        store.seed_from_weather_csv()
+                    _climatology = store
+                except Exception as e:
+                    logger.warning(f"Climatology store disabled: {e}")
+                    return None
+    return _climatology
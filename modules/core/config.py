@@ -1,4 +1,5 @@
 import os
+from typing import Tuple
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 
@@ -14,6 +15,60 @@ class Settings(BaseSettings):
     
     MODEL_PATH: str = "models/crop_model.pkl"
     SCALER_PATH: str = "models/scaler.pkl"
+    FOREST_PATH: str = "models/crop_forest"
+    MODEL_METADATA_PATH: str = "models/model_metadata.json"
+    LABELS_PATH: str = "models/labels.json"
+    PIPELINE_CACHE_DIR: str = "models/.pipeline_cache"
+    FIELD_SAMPLES_PATH: str = "data/field_samples.csv"
+    MODEL_REGISTRY_DIR: str = "models/registry"
+    MODEL_REGISTRY_POLL_SECONDS: float = 5.0
+    CROP_ENVELOPES_PATH: str = "models/crop_envelopes.npz"
+    CROP_ENVELOPES_SOURCE: str = "data/crop_recommendation.csv"
+
+    PREDICTION_CACHE_SIZE: int = 4096
+    PREDICTION_CACHE_TTL_SECONDS: int = 6 * 3600
+    PREDICTION_CACHE_WARM_KEYS: int = 1024
+
+    FORECAST_CACHE_SIZE: int = 512
+    FORECAST_TTL_SECONDS: int = 3600
+    HTTP_POOL_SIZE: int = 8
+    HTTP_BACKOFF_SECONDS: float = 0.25
+    HTTP_BREAKER_FAILURES: int = 5
+    HTTP_BREAKER_RESET_SECONDS: float = 60.0
+
+    LAND_HEDGE_AFTER_SECONDS: float = 1.5
+    LAND_FETCH_DEADLINE_SECONDS: float = 6.0
+    LAND_CLIMATE_CACHE_SIZE: int = 50_000
+    LAND_GRID_MAX_CELLS: int = 10_000
+    LAND_NEARBY_MARKETS: int = 3
+    # Months of climatology, from the current one, that map rainfall is averaged over.
+    LAND_SEASON_MONTHS: int = 4
+
+    WEATHER_BATCH_SIZE: int = 100
+    WEATHER_WORKERS: int = 4
+    CLIMATOLOGY_PATH: str = "data/climatology.npy"
+    # South, west, north, east of the normals grid, in degrees.
+    CLIMATOLOGY_BOUNDS: Tuple[float, float, float, float] = (6.0, 68.0, 38.0, 98.0)
+    CLIMATOLOGY_RESOLUTION: float = 0.25
+    SPATIAL_CELL_DEGREES: float = 1.0
+    GAZETTEER_PATH: str = "data/india_gazetteer.csv"
+    GEOCODE_CACHE_PATH: str = "data/geocode_cache.sqlite"
+    GEOCODE_CACHE_TTL_SECONDS: int = 90 * 24 * 3600
+    GEOCODE_NEGATIVE_TTL_SECONDS: int = 24 * 3600
+
+    DRIFT_REFERENCE_PATH: str = "data/crop_recommendation.csv"
+    DRIFT_BINS: int = 10
+    DRIFT_WINDOW_SIZE: int = 5000
+
+    BULK_CHUNK_ROWS: int = 20_000
+    BULK_WORKERS: int = max(1, (os.cpu_count() or 2) - 1)
+    BULK_JOBS_DIR: str = "data/bulk_jobs"
+    # Larger scored files are offered by path only; download_button holds the file in memory.
+    BULK_DOWNLOAD_MAX_MB: int = 50
+
+    RESEARCH_CACHE_PATH: str = "data/research_cache.json"
+    RESEARCH_TTL_SECONDS: int = 24 * 3600
+    RESEARCH_WORKERS: int = 2
     
     DEBUG: bool = True
 
@@ -0,0 +1,203 @@
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from modules.core.config import settings
+from modules.core.logger import get_logger
+
+logger = get_logger("HTTP_Client")
+
+# Total time budget per call, retries included, and retry count per provider.
+PROVIDER_POLICIES = {
+    "open_meteo": {"deadline": 8.0, "retries": 2},
+    "nasa_power": {"deadline": 12.0, "retries": 1},
+    "default": {"deadline": 10.0, "retries": 1},
+}
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+class ProviderUnavailable(requests.exceptions.RequestException):
+    """Raised without a network call while a provider's circuit is open."""
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    for `reset_seconds`; then lets one trial call through (half-open) and
+    closes again if it succeeds.
+    """
+
+    def __init__(self, failure_threshold: int = settings.HTTP_BREAKER_FAILURES,
+                 reset_seconds: float = settings.HTTP_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_seconds or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Counts a failure; True when this failure opened (or re-opened) the circuit."""
+        with self._lock:
+            self.failures += 1
+            reopened = self._trial_in_flight
+            self._trial_in_flight = False
+            if reopened or (self.opened_at is None and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+class ProviderStats:
+    """Call counters and a window of recent latencies for one provider."""
+
+    def __init__(self, window: int = 200):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.short_circuits = 0
+        self.latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool, retries: int):
+        with self._lock:
+            self.calls += 1
+            self.retries += retries
+            self.errors += not ok
+            self.latencies.append(latency)
+
+    def record_short_circuit(self):
+        with self._lock:
+            self.short_circuits += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self.latencies)
+        pick = lambda q: round(latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000, 1) if latencies else None
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.calls, 4) if self.calls else 0.0,
+            "retries": self.retries,
+            "short_circuits": self.short_circuits,
+            "p50_ms": pick(0.5),
+            "p95_ms": pick(0.95),
+        }
+
+class HttpClient:
+    """
+    One pooled session for every outbound call. Each call names its provider,
+    which selects the deadline and retry budget and the circuit breaker and
+    counters it is accounted to.
+    """
+
+    def __init__(self, pool_size: int = settings.HTTP_POOL_SIZE,
+                 backoff_seconds: float = settings.HTTP_BACKOFF_SECONDS):
+        self.backoff_seconds = backoff_seconds
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "CropVanta/1.0"})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._stats: Dict[str, ProviderStats] = {}
+        self._lock = threading.Lock()
+
+    def _provider(self, provider: str):
+        with self._lock:
+            if provider not in self._breakers:
+                self._breakers[provider] = CircuitBreaker()
+                self._stats[provider] = ProviderStats()
+            return self._breakers[provider], self._stats[provider]
+
+    def request(self, provider: str, method: str, url: str, deadline: Optional[float] = None,
+                retries: Optional[int] = None, **kwargs) -> requests.Response:
+        """
+        Sends the request with bounded retries (full jitter) inside the
+        provider's deadline. Raises ProviderUnavailable while the circuit is
+        open, otherwise the last exception; every outcome settles the breaker.
+        """
+        policy = PROVIDER_POLICIES.get(provider, PROVIDER_POLICIES["default"])
+        deadline = policy["deadline"] if deadline is None else deadline
+        retries = policy["retries"] if retries is None else retries
+        breaker, stats = self._provider(provider)
+        if not breaker.allow():
+            stats.record_short_circuit()
+            raise ProviderUnavailable(f"{provider} circuit open, failing fast")
+
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            remaining = deadline - (time.monotonic() - start)
+            try:
+                response = self.session.request(method, url, timeout=max(remaining, 0.1), **kwargs)
+                if response.status_code in RETRY_STATUS:
+                    response.raise_for_status()
+                breaker.record_success()
+                stats.record(time.monotonic() - start, True, attempt)
+                return response
+            except requests.exceptions.RequestException as e:
+                transient = isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                                           requests.exceptions.HTTPError))
+                delay = random.uniform(0, self.backoff_seconds * 2 ** attempt)
+                elapsed = time.monotonic() - start
+                if transient and attempt < retries and elapsed + delay < deadline:
+                    attempt += 1
+                    time.sleep(delay)
+                    continue
+                stats.record(elapsed, False, attempt)
+                if breaker.record_failure():
+                    logger.warning(f"Circuit opened for {provider} after {breaker.failures} failures: {e}")
+                raise
+            except BaseException as e:
+                # Anything else (bad arguments, an interrupt) must still settle
+                # a half-open trial, or the provider fails fast until restart.
+                stats.record(time.monotonic() - start, False, attempt)
+                if breaker.record_failure():
+                    logger.warning(f"Circuit opened for {provider} after {breaker.failures} failures: {e!r}")
+                raise
+
+    def get(self, provider: str, url: str, **kwargs) -> requests.Response:
+        return self.request(provider, "GET", url, **kwargs)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            providers = list(self._stats)
+        return [{"provider": name, "circuit": self._breakers[name].state, **self._stats[name].summary()}
+                for name in providers]
+
+_http_client: Optional[HttpClient] = None
+_http_client_lock = threading.Lock()
+
+def get_http_client() -> HttpClient:
+    """Process-wide client: one connection pool, one breaker per provider."""
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = HttpClient()
+    return _http_client
@@ -1,16 +1,55 @@
 import numpy as np
-from typing import Dict, Any, Optional
+import pandas as pd
+from typing import Dict, Any, List, Optional, Tuple, Union
 from modules.core.logger import get_logger
 from modules.core.schemas import CropInput
-from modules.ai_researcher import perform_crop_research 
+from modules.ai_researcher import get_research_cache
+from modules.core.config import settings
+from modules.model_engines import ENGINES, engine_of
+from modules.model_registry import ModelBundle
+from modules.prediction_cache import PredictionCache, dequantize_key, quantize_input
 
 logger = get_logger("Crop_Advisor_Engine")
 
+FEATURE_ORDER = ["nitrogen", "phosphorus", "potassium", "temperature", "humidity", "ph", "rainfall"]
+CSV_FEATURE_ORDER = ["N", "P", "K", "temperature", "humidity", "ph", "rainfall"]
+
+def input_bounds() -> np.ndarray:
+    """(7, 2) [low, high] bounds in FEATURE_ORDER from the CropInput field constraints."""
+    bounds = np.tile([-np.inf, np.inf], (len(FEATURE_ORDER), 1))
+    for i, field in enumerate(FEATURE_ORDER):
+        for constraint in CropInput.model_fields[field].metadata:
+            if hasattr(constraint, "ge"):
+                bounds[i, 0] = constraint.ge
+            if hasattr(constraint, "le"):
+                bounds[i, 1] = constraint.le
+    return bounds
+
+def feature_matrix(samples: Union[np.ndarray, pd.DataFrame]) -> np.ndarray:
+    """Raw (n, 7) feature array in FEATURE_ORDER from an array or a DataFrame with schema or CSV column names."""
+    if isinstance(samples, pd.DataFrame):
+        if set(FEATURE_ORDER).issubset(samples.columns):
+            samples = samples[FEATURE_ORDER]
+        elif set(CSV_FEATURE_ORDER).issubset(samples.columns):
+            samples = samples[CSV_FEATURE_ORDER]
+        else:
+            raise ValueError(f"Expected columns {FEATURE_ORDER} or {CSV_FEATURE_ORDER}")
+        features = samples.to_numpy(dtype=float)
+    else:
+        features = np.asarray(samples, dtype=float)
+        if features.ndim == 1:
+            features = features.reshape(1, -1)
+
+    if features.ndim != 2 or features.shape[1] != len(FEATURE_ORDER):
+        raise ValueError(f"Expected shape (n, {len(FEATURE_ORDER)}), got {features.shape}")
+    return features
+
 class CropAdvisor:
-    def __init__(self, model: Any, scaler: Any):
-        self.model = model
-        self.scaler = scaler
-        self.version = "3.1.0-Stable"
+    def __init__(self, bundle: ModelBundle, cache: Optional[PredictionCache] = None, drift_monitor: Any = None):
+        # Every request reads this reference once; swap() replaces it whole.
+        self._bundle = bundle
+        self.drift_monitor = drift_monitor
+        self.cache = cache if cache is not None else PredictionCache()
         
         self.offline_db = {
             'Rice': "Requires high humidity and heavy rainfall. Best grown in clayey soil.",
@@ -20,60 +59,205 @@ class CropAdvisor:
             'Cotton': "Requires high temperature, light rainfall, and 210 frost-free days."
         }
 
-        self.crop_map = {
-            20: 'Rice', 11: 'Maize', 3: 'Chickpea', 9: 'Kidneybeans', 18: 'Pigeonpeas',
-            13: 'Mothbeans', 14: 'Mungbean', 2: 'Blackgram', 10: 'Lentil', 19: 'Pomegranate',
-            1: 'Banana', 12: 'Mango', 7: 'Grapes', 21: 'Watermelon', 15: 'Muskmelon',
-            0: 'Apple', 16: 'Orange', 17: 'Papaya', 4: 'Coconut', 6: 'Cotton',
-            8: 'Jute', 5: 'Coffee'
-        }
+    @property
+    def bundle(self) -> ModelBundle:
+        return self._bundle
+
+    @property
+    def model(self) -> Any:
+        return self._bundle.model
+
+    @property
+    def crop_map(self) -> Dict[int, str]:
+        return self._bundle.crop_map
+
+    def swap(self, bundle: ModelBundle):
+        """
+        Switches to a new model bundle. The hottest cached inputs are re-scored
+        with the new model first, so the cache is warm the moment it goes live.
+        """
+        keys = self.cache.hot_keys(settings.PREDICTION_CACHE_WARM_KEYS)
+        warmed = {}
+        if keys:
+            grid = np.array([dequantize_key(key) for key in keys], dtype=float)
+            probabilities, bias, contributions = self._score(bundle, self._scale(grid, bundle))
+            warmed = {key: self._prediction(bundle, probabilities[i],
+                                            None if bias is None else bias[i],
+                                            None if contributions is None else contributions[i])
+                      for i, key in enumerate(keys)}
+        self.cache.rebind(bundle.model_version, warmed)
+        previous, self._bundle = self._bundle, bundle
+        logger.info(f"Swapped model {previous.version} -> {bundle.version} ({len(warmed)} cache entries pre-scored)")
 
-    def _prepare_features(self, data: CropInput) -> np.ndarray:
+    @staticmethod
+    def _scale(features: np.ndarray, bundle: ModelBundle) -> np.ndarray:
+        return features if bundle.scaler is None else bundle.scaler.transform(features)
+
+    def _prepare_features(self, data: CropInput, bundle: ModelBundle) -> np.ndarray:
         try:
             feature_list = [
                 data.nitrogen, data.phosphorus, data.potassium, 
                 data.temperature, data.humidity, data.ph, data.rainfall
             ]
             features = np.array(feature_list).reshape(1, -1)
-            return self.scaler.transform(features)
+            return self._scale(features, bundle)
         except Exception as e:
             logger.error(f"Transformation Error: {e}")
             raise ValueError("Invalid Input Data")
 
+    def _prepare_batch(self, samples: Union[np.ndarray, pd.DataFrame], bundle: ModelBundle) -> np.ndarray:
+        """Accepts an (n, 7) array or a DataFrame with schema or CSV column names."""
+        try:
+            return self._scale(feature_matrix(samples), bundle)
+        except Exception as e:
+            logger.error(f"Batch Transformation Error: {e}")
+            raise ValueError("Invalid Input Data")
+
+    def predict_proba_many(self, samples: Union[np.ndarray, pd.DataFrame]) -> Tuple[np.ndarray, List[str]]:
+        """(n, n_classes) probabilities in one predict_proba call, plus the crop name of each column."""
+        bundle = self._bundle
+        return bundle.model.predict_proba(self._prepare_batch(samples, bundle)), bundle.label_names()
+
+    def recommend_many(self, samples: Union[np.ndarray, pd.DataFrame], top_k: int = 3) -> pd.DataFrame:
+        """
+        Scores a batch of soil samples with a single predict_proba pass.
+        Labels, confidence and top-k all come from the same probability matrix.
+        """
+        bundle = self._bundle
+        probabilities = bundle.model.predict_proba(self._prepare_batch(samples, bundle))
+
+        classes = np.asarray(bundle.model.classes_)
+        names = np.array(bundle.label_names(), dtype=object)
+        top_k = max(1, min(top_k, probabilities.shape[1]))
+
+        top_idx = np.argsort(-probabilities, axis=1, kind="stable")[:, :top_k]
+        top_probs = np.take_along_axis(probabilities, top_idx, axis=1)
+        best_idx = top_idx[:, 0]
+        confidence = top_probs[:, 0]
+
+        return pd.DataFrame({
+            "crop_name": names[best_idx],
+            "label_id": classes[best_idx].astype(int),
+            "confidence_score": np.round(confidence * 100, 2),
+            "is_reliable": confidence > 0.75,
+            "top_k": [
+                [(names[i], round(float(p), 4)) for i, p in zip(row_idx, row_probs)]
+                for row_idx, row_probs in zip(top_idx, top_probs)
+            ],
+        })
+
+    def get_research(self, crop_name: str) -> Optional[str]:
+        """Returns cached web research for the crop, queueing a background fetch on a miss."""
+        try:
+            return get_research_cache().request(crop_name)
+        except Exception as e:
+            logger.warning(f"Research cache unavailable, using offline data: {e}")
+            return None
+
+    @property
+    def model_version(self) -> str:
+        """Identifies the loaded model; prediction cache entries are bound to it."""
+        return self._bundle.model_version
+
+    @staticmethod
+    def _score(bundle: ModelBundle, scaled_features: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+        """Probabilities plus, for compiled forests, per-feature contributions to the predicted class."""
+        if hasattr(bundle.model, "explain"):
+            return bundle.model.explain(scaled_features)
+        return bundle.model.predict_proba(scaled_features), None, None
+
+    @staticmethod
+    def _prediction(bundle: ModelBundle, probabilities: np.ndarray, bias: Optional[float] = None,
+                    contributions: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        best_idx = int(np.argmax(probabilities))
+        predicted_label = int(bundle.model.classes_[best_idx])
+        explanation = None
+        if contributions is not None:
+            explanation = {
+                "bias": round(float(bias), 4),
+                "contributions": {f: round(float(c), 4) for f, c in zip(FEATURE_ORDER, contributions)},
+            }
+        return {
+            "crop_name": bundle.crop_map.get(predicted_label, "Unknown"),
+            "confidence": float(probabilities[best_idx]),
+            "label_id": predicted_label,
+            "model_version": bundle.version,
+            "explanation": explanation,
+        }
+
+    def explain_many(self, samples: Union[np.ndarray, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Per-feature contributions to each row's recommended crop, from one
+        vectorized walk of the forest's decision paths. For every row
+        bias + sum(contributions) equals the confidence.
+        """
+        bundle = self._bundle
+        if not hasattr(bundle.model, "explain"):
+            raise ValueError(f"{self.engine_label} does not support path explanations")
+        probabilities, bias, contributions = self._score(bundle, self._prepare_batch(samples, bundle))
+        best_idx = probabilities.argmax(axis=1)
+        names = np.array(bundle.label_names(), dtype=object)
+        frame = pd.DataFrame(contributions, columns=FEATURE_ORDER)
+        frame.insert(0, "crop_name", names[best_idx])
+        frame.insert(1, "confidence", probabilities[np.arange(len(best_idx)), best_idx])
+        frame.insert(2, "bias", bias)
+        return frame
+
+    def _predict_one(self, input_data: CropInput) -> Dict[str, Any]:
+        """
+        Scores the input's FEATURE_PRECISION grid point, not the raw values, so
+        a cached answer does not depend on which of the near-identical inputs
+        arrived first; bulk scoring snaps rows the same way.
+        """
+        bundle = self._bundle
+        key = quantize_input(input_data)
+        prediction = self.cache.get(key, bundle.model_version)
+        if prediction is not None:
+            return prediction
+
+        features = self._prepare_features(CropInput(**dict(zip(FEATURE_ORDER, dequantize_key(key)))), bundle)
+        probabilities, bias, contributions = self._score(bundle, features)
+        prediction = self._prediction(bundle, probabilities[0], None if bias is None else bias[0],
+                                      None if contributions is None else contributions[0])
+        self.cache.put(key, bundle.model_version, prediction)
+        return prediction
+
+    @property
+    def engine_label(self) -> str:
+        engine = engine_of(self.model)
+        return f"{ENGINES[engine].label if engine in ENGINES else engine}_Integrated"
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
     def recommend_crop(self, input_data: CropInput) -> Dict[str, Any]:
         try:
-            scaled_features = self._prepare_features(input_data)
-            predicted_label = self.model.predict(scaled_features)[0]
-            crop_name = self.crop_map.get(predicted_label, "Unknown")
-
-            confidence = 0.0
-            if hasattr(self.model, "predict_proba"):
-                probabilities = self.model.predict_proba(scaled_features)[0]
-                confidence = float(np.max(probabilities))
-
-            try:
-                logger.info(f"Attempting Research for: {crop_name}")
-                research_insights = perform_crop_research(crop_name)
-                
-                if not research_insights or "**" in research_insights:
-                    research_insights = self.offline_db.get(crop_name, "Highly suitable based on soil NPK levels.")
-            except Exception as res_err:
-                logger.warning(f"Research failed, using offline data: {res_err}")
-                research_insights = self.offline_db.get(crop_name, "Optimal growth predicted for this season.")
+            if self.drift_monitor is not None:
+                self.drift_monitor.observe(input_data)
+            prediction = self._predict_one(input_data)
+            crop_name = prediction["crop_name"]
+            confidence = prediction["confidence"]
+
+            research_insights = self.get_research(crop_name)
+            research_status = "ready" if research_insights else "pending"
+            if not research_insights:
+                research_insights = self.offline_db.get(crop_name, "Highly suitable based on soil NPK levels.")
 
             return {
                 "status": "success",
                 "crop_name": crop_name,
                 "description": research_insights, 
+                "research_status": research_status,
                 "confidence_score": round(confidence * 100, 2),
-                "model_version": self.version,
+                "model_version": prediction["model_version"],
+                "explanation": prediction.get("explanation"),
                 "metadata": {
                     "is_reliable": confidence > 0.75,
-                    "engine": "RandomForest_Integrated",
-                    "label_id": int(predicted_label)
+                    "engine": self.engine_label,
+                    "label_id": prediction["label_id"]
                 }
             }
 
         except Exception as e:
             logger.error(f"Recommendation Error: {str(e)}")
-            return {"status": "error", "message": str(e)}
\ No newline at end of file
+            return {"status": "error", "message": str(e)}
@@ -0,0 +1,115 @@
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from modules.core.config import settings
+from modules.core.logger import get_logger
+
+logger = get_logger("Crop_Envelopes")
+
+ENVELOPE_FEATURES = ["N", "P", "K", "temperature", "humidity", "ph", "rainfall"]
+# Outer and core band of each envelope: p5-p95 and p25-p75.
+ENVELOPE_PERCENTILES = (5, 25, 75, 95)
+
+class CropEnvelopes:
+    """
+    Per-crop percentile envelopes of the training data, one
+    (n_crops, n_features, 4) float32 array of p5/p25/p75/p95.
+
+    A value inside a crop's p25-p75 core scores 1, falls linearly to 0.5 at
+    the p5/p95 edge and to 0 one more tail-width beyond it. A cell's score
+    is the mean over the features supplied, so callers that only know
+    climate (the map) and callers with a full soil report use the same table.
+
+    Values are in the training data's units; rainfall is mm per month over
+    the growing season (about 20-300), not a week's or a season's total.
+    """
+
+    def __init__(self, crops: Sequence[str], envelopes: np.ndarray, features: Sequence[str] = ENVELOPE_FEATURES):
+        self.crops = list(crops)
+        self.features = list(features)
+        self.envelopes = np.asarray(envelopes, dtype=np.float32)
+        # Floor on band widths so a crop with a near-constant feature does not divide by zero.
+        spread = self.envelopes[..., 3].max(axis=0) - self.envelopes[..., 0].min(axis=0)
+        self._min_width = np.maximum(spread * 0.01, 1e-3)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, label_column: str = "label") -> "CropEnvelopes":
+        crops = sorted(df[label_column].unique())
+        grouped = df.groupby(label_column)[ENVELOPE_FEATURES]
+        envelopes = np.stack([grouped.quantile(p / 100).loc[crops].to_numpy() for p in ENVELOPE_PERCENTILES],
+                             axis=-1)
+        return cls(crops, envelopes)
+
+    def save(self, path: str = settings.CROP_ENVELOPES_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, envelopes=self.envelopes, crops=np.array(self.crops), features=np.array(self.features),
+                     percentiles=np.array(ENVELOPE_PERCENTILES))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = settings.CROP_ENVELOPES_PATH) -> "CropEnvelopes":
+        with np.load(path) as data:
+            return cls(data["crops"].tolist(), data["envelopes"], data["features"].tolist())
+
+    def score(self, **values) -> np.ndarray:
+        """
+        Graded suitability (0-100) of every crop for arrays of feature values,
+        e.g. score(temperature=t, rainfall=r). All arrays share one shape; the
+        result adds a trailing crop axis. NaN inputs are skipped per cell, and
+        a cell with no usable feature scores NaN.
+        """
+        unknown = set(values) - set(self.features)
+        if unknown:
+            raise ValueError(f"Unknown envelope features: {sorted(unknown)}")
+        names = [f for f in self.features if f in values]
+        idx = [self.features.index(f) for f in names]
+        x = np.stack([np.asarray(values[f], dtype=np.float32) for f in names], axis=-1)[..., None, :]
+
+        env = self.envelopes[:, idx, :]
+        p5, p25, p75, p95 = (env[..., k] for k in range(4))
+        min_width = self._min_width[idx]
+        below = (p25 - x) / np.maximum(p25 - p5, min_width)
+        above = (x - p75) / np.maximum(p95 - p75, min_width)
+        distance = np.maximum(np.maximum(below, above), 0.0)
+        per_feature = np.clip(1.0 - 0.5 * distance, 0.0, 1.0)
+
+        valid = ~np.isnan(x)
+        counts = valid.sum(axis=-1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scores = 100.0 * np.where(valid, per_feature, 0.0).sum(axis=-1) / counts
+        return np.where(counts > 0, scores, np.nan)
+
+    def ranges(self, crop: str) -> Dict[str, Tuple[float, float]]:
+        """Core (p25-p75) band per feature for one crop, for display."""
+        env = self.envelopes[self.crops.index(crop)]
+        return {f: (round(float(env[i, 1]), 1), round(float(env[i, 2]), 1)) for i, f in enumerate(self.features)}
+
+def build_envelopes(data_path: str = settings.CROP_ENVELOPES_SOURCE,
+                    output_path: str = settings.CROP_ENVELOPES_PATH) -> CropEnvelopes:
+    envelopes = CropEnvelopes.from_dataframe(pd.read_csv(data_path))
+    envelopes.save(output_path)
+    logger.info(f"Crop envelopes for {len(envelopes.crops)} crops written to {output_path}")
+    return envelopes
+
+_crop_envelopes: Optional[CropEnvelopes] = None
+_envelopes_lock = threading.Lock()
+
+def get_crop_envelopes() -> CropEnvelopes:
+    """Process-wide envelopes; built from the training data on first use if the file is missing."""
+    global _crop_envelopes
+    if _crop_envelopes is None:
+        with _envelopes_lock:
+            if _crop_envelopes is None:
+                if Path(settings.CROP_ENVELOPES_PATH).exists():
+                    _crop_envelopes = CropEnvelopes.load()
+                else:
+                    _crop_envelopes = build_envelopes()
+    return _crop_envelopes
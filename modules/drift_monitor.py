@@ -0,0 +1,147 @@
+import threading
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from modules.core.config import settings
+from modules.core.logger import get_logger
+from modules.core.schemas import CropInput
+from modules.crop_advisor import CSV_FEATURE_ORDER, FEATURE_ORDER
+
+logger = get_logger("Drift_Monitor")
+
+# Population Stability Index bands commonly used for model inputs.
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+class DriftMonitor:
+    """
+    Fixed-memory histogram sketches of live inputs, compared with the
+    training data by PSI.
+
+    Bin edges are the reference quantiles of each feature (plus an underflow
+    and an overflow bin), so the reference histogram is close to uniform and
+    every bin carries signal. Recording a request is a handful of bisects and
+    integer increments on plain lists. Live counts roll over every
+    `window_size` requests; scores use the previous and current windows.
+    """
+
+    def __init__(self, reference: pd.DataFrame, n_bins: int = settings.DRIFT_BINS,
+                 window_size: int = settings.DRIFT_WINDOW_SIZE):
+        self.window_size = window_size
+        quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+        self.edges: List[List[float]] = []
+        reference_counts = []
+        for column in CSV_FEATURE_ORDER:
+            values = reference[column].dropna().to_numpy(dtype=float)
+            edges = np.unique(np.quantile(values, quantiles))
+            edges = np.concatenate([[values.min()], edges, [np.nextafter(values.max(), np.inf)]])
+            self.edges.append(edges.tolist())
+            reference_counts.append(np.bincount(np.searchsorted(edges, values, side="right"),
+                                                minlength=len(edges) + 1))
+        self.reference_counts = reference_counts
+        self.reference_medians = reference[CSV_FEATURE_ORDER].median().to_numpy()
+        self._lock = threading.Lock()
+        self._current = self._empty()
+        self._previous = self._empty()
+        self._current_n = 0
+        self._previous_n = 0
+        self.total = 0
+
+    def _empty(self) -> List[List[int]]:
+        return [[0] * (len(edges) + 1) for edges in self.edges]
+
+    def observe(self, data: CropInput):
+        """Records one request; a few microseconds, no NumPy on this path."""
+        values = (data.nitrogen, data.phosphorus, data.potassium, data.temperature,
+                  data.humidity, data.ph, data.rainfall)
+        with self._lock:
+            for counts, edges, value in zip(self._current, self.edges, values):
+                counts[bisect_right(edges, value)] += 1
+            self._current_n += 1
+            self.total += 1
+            if self._current_n >= self.window_size:
+                self._rotate()
+
+    def observe_many(self, features: np.ndarray):
+        """Records an (n, 7) batch in FEATURE_ORDER."""
+        with self._lock:
+            for i, edges in enumerate(self.edges):
+                bins = np.bincount(np.searchsorted(edges, features[:, i], side="right"), minlength=len(edges) + 1)
+                self._current[i] = (np.asarray(self._current[i]) + bins).tolist()
+            self._current_n += len(features)
+            self.total += len(features)
+            if self._current_n >= self.window_size:
+                self._rotate()
+
+    def _rotate(self):
+        self._previous, self._previous_n = self._current, self._current_n
+        self._current, self._current_n = self._empty(), 0
+
+    def _live_counts(self) -> Tuple[List[np.ndarray], int]:
+        with self._lock:
+            counts = [np.asarray(c) + np.asarray(p) for c, p in zip(self._current, self._previous)]
+            return counts, self._current_n + self._previous_n
+
+    @staticmethod
+    def _estimate_median(counts: np.ndarray, edges: List[float]) -> Optional[float]:
+        """Median by linear interpolation inside the histogram bin that holds it."""
+        n = counts.sum()
+        if n == 0:
+            return None
+        cumulative = np.cumsum(counts)
+        b = int(np.searchsorted(cumulative, n / 2))
+        if b == 0:
+            return edges[0]
+        if b > len(edges) - 1:
+            return edges[-1]
+        below = cumulative[b - 1]
+        return edges[b - 1] + (edges[b] - edges[b - 1]) * (n / 2 - below) / max(counts[b], 1)
+
+    def scores(self) -> Dict[str, Any]:
+        counts, n = self._live_counts()
+        features = []
+        for name, live, reference, edges, ref_median in zip(FEATURE_ORDER, counts, self.reference_counts,
+                                                            self.edges, self.reference_medians):
+            psi = None
+            status = "no data"
+            if n:
+                # Additive smoothing keeps empty bins from producing infinite PSI.
+                actual = (live + 0.5) / (n + 0.5 * len(live))
+                expected = (reference + 0.5) / (reference.sum() + 0.5 * len(reference))
+                psi = float(np.sum((actual - expected) * np.log(actual / expected)))
+                status = ("significant" if psi >= PSI_SIGNIFICANT else
+                          "moderate" if psi >= PSI_MODERATE else "stable")
+            median = self._estimate_median(live, edges)
+            features.append({
+                "feature": name,
+                "psi": None if psi is None else round(psi, 4),
+                "status": status,
+                "reference_median": round(float(ref_median), 2),
+                "live_median": None if median is None else round(float(median), 2),
+                "out_of_range": round(float((live[0] + live[-1]) / n), 4) if n else 0.0,
+            })
+        return {"observations": self.total, "window": n, "features": features}
+
+    def reset(self):
+        with self._lock:
+            self._current, self._previous = self._empty(), self._empty()
+            self._current_n = self._previous_n = 0
+
+_drift_monitor: Optional[DriftMonitor] = None
+_drift_lock = threading.Lock()
+
+def get_drift_monitor() -> Optional[DriftMonitor]:
+    """Process-wide monitor built from DRIFT_REFERENCE_PATH; None if the reference data is missing."""
+    global _drift_monitor
+    if _drift_monitor is None:
+        with _drift_lock:
+            if _drift_monitor is None:
+                try:
+                    _drift_monitor = DriftMonitor(pd.read_csv(settings.DRIFT_REFERENCE_PATH))
+                except Exception as e:
+                    logger.warning(f"Drift monitor disabled: {e}")
+                    return None
+    return _drift_monitor
@@ -0,0 +1,117 @@
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence
+from modules.core.logger import get_logger
+from modules.core.schemas import CropInput
+from modules.crop_advisor import FEATURE_ORDER, CropAdvisor, input_bounds
+from modules.prediction_cache import quantize_batch
+
+logger = get_logger("Fertilizer_Advisor")
+
+# Candidate changes around the submitted soil report, per adjustable field.
+DEFAULT_STEPS = {
+    "nitrogen": np.arange(-40, 61, 10),
+    "phosphorus": np.arange(-30, 41, 10),
+    "potassium": np.arange(-40, 61, 10),
+    "ph": np.arange(-1.0, 1.01, 0.25),
+}
+
+# Approximate cost in Rs/ha per unit of change (raise, lower). Raising uses
+# urea / DAP / MOP / agricultural lime; lowering pH uses elemental sulphur.
+# Lowering a nutrient means withholding fertilizer, priced like raising it
+# so the sweep still prefers the smallest change in either direction.
+ADJUSTMENT_COSTS = {
+    "nitrogen": (13.0, 13.0),
+    "phosphorus": (59.0, 59.0),
+    "potassium": (57.0, 57.0),
+    "ph": (5000.0, 6000.0),
+}
+
+class FertilizerAdvisor:
+    """Answers "what is the cheapest N/P/K/pH change that makes this crop the top pick?"."""
+
+    def __init__(self, crop_advisor: CropAdvisor, steps: Optional[Dict[str, Sequence[float]]] = None,
+                 costs: Optional[Dict[str, tuple]] = None):
+        self.crop_advisor = crop_advisor
+        self.steps = {field: np.asarray(values, dtype=float) for field, values in (steps or DEFAULT_STEPS).items()}
+        self.costs = costs or ADJUSTMENT_COSTS
+
+    def _candidate_grid(self, base: np.ndarray) -> np.ndarray:
+        """Every combination of steps applied to `base`, clipped to the input bounds and snapped to the cache grid."""
+        columns = [FEATURE_ORDER.index(field) for field in self.steps]
+        deltas = np.stack(np.meshgrid(*self.steps.values(), indexing="ij"), axis=-1).reshape(-1, len(columns))
+        grid = np.repeat(base[None, :], len(deltas), axis=0)
+        grid[:, columns] += deltas
+        bounds = input_bounds()
+        grid = quantize_batch(np.clip(grid, bounds[:, 0], bounds[:, 1]))
+        # Clipping folds several deltas onto the same point; keep one of each.
+        return np.unique(grid, axis=0)
+
+    def _cost(self, deltas: np.ndarray) -> np.ndarray:
+        cost = np.zeros(len(deltas))
+        for field, (raise_cost, lower_cost) in self.costs.items():
+            d = deltas[:, FEATURE_ORDER.index(field)]
+            cost += np.where(d > 0, d * raise_cost, -d * lower_cost)
+        return cost
+
+    def _adjustment(self, point: np.ndarray, base: np.ndarray) -> Dict[str, float]:
+        return {field: round(float(point[FEATURE_ORDER.index(field)] - base[FEATURE_ORDER.index(field)]), 2)
+                for field in self.steps}
+
+    def sweep(self, input_data: CropInput, target_crop: str, target_probability: float = 0.0,
+              alternatives: int = 5) -> Dict[str, Any]:
+        """
+        Scores the whole adjustment grid with one predict_proba call and returns
+        the cheapest point where `target_crop` is the top recommendation with at
+        least `target_probability`.
+        """
+        try:
+            base = quantize_batch(np.array([[getattr(input_data, f) for f in FEATURE_ORDER]], dtype=float))[0]
+            grid = self._candidate_grid(base)
+            probabilities, names = self.crop_advisor.predict_proba_many(grid)
+
+            lookup = [name.lower() for name in names]
+            if target_crop.lower() not in lookup:
+                return {"status": "error", "message": f"Unknown crop: {target_crop}"}
+            target = lookup.index(target_crop.lower())
+
+            deltas = grid - base
+            cost = self._cost(deltas)
+            target_prob = probabilities[:, target]
+            reached = (probabilities.argmax(axis=1) == target) & (target_prob >= target_probability)
+
+            base_idx = int(np.argmin(np.abs(deltas).sum(axis=1)))
+            baseline = {
+                "probability": round(float(target_prob[base_idx]), 4),
+                "rank": int((probabilities[base_idx] > target_prob[base_idx]).sum()) + 1,
+                "top_crop": names[int(probabilities[base_idx].argmax())],
+            }
+
+            result = {
+                "status": "success",
+                "target_crop": names[target],
+                "target_probability": target_probability,
+                "grid_size": len(grid),
+                "baseline": baseline,
+                "found": bool(reached.any()),
+            }
+            if not reached.any():
+                best = int(np.argmax(target_prob))
+                result["closest"] = {"adjustment": self._adjustment(grid[best], base),
+                                     "probability": round(float(target_prob[best]), 4),
+                                     "top_crop": names[int(probabilities[best].argmax())]}
+                return result
+
+            # Cheapest first; among equal cost the more confident point wins.
+            order = np.flatnonzero(reached)[np.lexsort((-target_prob[reached], cost[reached]))]
+            options: List[Dict[str, Any]] = [{
+                "adjustment": self._adjustment(grid[i], base),
+                "adjusted_input": dict(zip(FEATURE_ORDER, (round(float(v), 2) for v in grid[i]))),
+                "cost": round(float(cost[i]), 2),
+                "probability": round(float(target_prob[i]), 4),
+            } for i in order[:alternatives]]
+            result.update(options[0])
+            result["alternatives"] = options[1:]
+            return result
+        except Exception as e:
+            logger.error(f"What-if sweep error: {e}")
+            return {"status": "error", "message": str(e)}
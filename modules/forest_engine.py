@@ -0,0 +1,431 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from modules.core.logger import get_logger
+
+logger = get_logger("Forest_Engine")
+
+def _raw_threshold(threshold: np.ndarray, mean: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """
+    Largest raw x with float32((x - mean) / scale) <= threshold, per node.
+
+    The scaled comparison is monotone in x, so a vectorized bisection around
+    the algebraic answer `threshold * scale + mean` converges to the exact cut.
+    """
+    def goes_left(x):
+        return ((x - mean) / scale).astype(np.float32) <= threshold
+
+    guess = threshold * scale + mean
+    width = (np.abs(threshold) * 2.0 ** -20 + 2.0 ** -120) * scale + np.abs(guess) * 2.0 ** -40
+    lo, hi = guess - width, guess + width
+    for _ in range(64):
+        bad_lo, bad_hi = ~goes_left(lo), goes_left(hi)
+        if not (bad_lo.any() or bad_hi.any()):
+            break
+        width = width * 2
+        lo = np.where(bad_lo, guess - width, lo)
+        hi = np.where(bad_hi, guess + width, hi)
+
+    for _ in range(2100):
+        mid = lo + (hi - lo) / 2
+        active = (mid != lo) & (mid != hi)
+        if not active.any():
+            break
+        left = goes_left(mid)
+        lo = np.where(active & left, mid, lo)
+        hi = np.where(active & ~left, mid, hi)
+    return lo
+
+def _as_kind(array: Any, kinds: str, default: Any) -> np.ndarray:
+    array = np.asarray(array)
+    return array if array.dtype.kind in kinds else array.astype(default)
+
+class CompiledForest:
+    """
+    A RandomForestClassifier flattened into contiguous node arrays.
+
+    All trees share one set of arrays; leaves point to themselves and carry a
+    +inf threshold, so every row can be walked for exactly `max_depth` steps
+    without branching. `predict_proba` mirrors sklearn's output (mean of the
+    per-tree leaf class distributions) and exposes `classes_`, so it can be
+    used anywhere the estimator was.
+
+    A NaN feature follows sklearn's per-node missing-value direction
+    (`missing_left`), so NaN inputs get the same leaves as the estimator.
+
+    A forest with `scaler_folded=True` has had a StandardScaler baked into its
+    split thresholds (see `fold_scaler`) and takes raw, unscaled features.
+
+    Arrays are stored on disk as plain .npy files in the dtype used for
+    inference and opened with memory mapping, so every process serving the
+    same artifact shares one copy in the OS page cache.
+    """
+
+    FORMAT = "cropvanta-forest"
+    FORMAT_VERSION = 1
+    ARRAY_FIELDS = ("feature", "threshold", "children", "value", "roots", "classes_", "missing_left")
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, children: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, classes_: np.ndarray,
+                 max_depth: int, n_features_in_: int, scaler_folded: bool = False,
+                 metadata: Optional[Dict[str, Any]] = None, fingerprint: Optional[str] = None,
+                 missing_left: Optional[np.ndarray] = None):
+        # Arrays keep the dtype they were stored with (see `compress`), so a
+        # memory-mapped array is never copied (or un-shared) on load. `children`
+        # interleaves [left, right] pairs: the next node is one gather at
+        # 2 * node + go_right.
+        self.feature = _as_kind(feature, "iu", np.intp)
+        self.threshold = _as_kind(threshold, "f", np.float64)
+        self.children = _as_kind(children, "iu", np.intp)
+        self.value = _as_kind(value, "f", np.float64)
+        self.roots = _as_kind(roots, "iu", np.intp)
+        self.classes_ = classes_
+        # Artifacts saved before missing_left existed sent NaN left everywhere.
+        self.missing_left = (np.ones(len(self.feature), dtype=bool) if missing_left is None
+                             else _as_kind(missing_left, "b", bool))
+        self.max_depth = int(max_depth)
+        self.n_features_in_ = int(n_features_in_)
+        self.scaler_folded = bool(scaler_folded)
+        self.metadata = metadata or {}
+        self._fingerprint = fingerprint
+
+    @property
+    def fingerprint(self) -> str:
+        """Content hash of the node arrays; changes whenever the model does."""
+        if self._fingerprint is None:
+            digest = hashlib.sha1()
+            for name in self.ARRAY_FIELDS:
+                digest.update(np.ascontiguousarray(getattr(self, name)).tobytes())
+            self._fingerprint = digest.hexdigest()[:16]
+        return self._fingerprint
+
+    @property
+    def left(self) -> np.ndarray:
+        return self.children[0::2]
+
+    @property
+    def right(self) -> np.ndarray:
+        return self.children[1::2]
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, model: Any) -> "CompiledForest":
+        """Flattens a fitted sklearn RandomForestClassifier (or a single tree)."""
+        estimators = getattr(model, "estimators_", [model])
+        n_classes = len(model.classes_)
+
+        features, thresholds, children, values, roots, missing_left = [], [], [], [], [], []
+        offset, max_depth = 0, 0
+
+        for est in estimators:
+            tree = est.tree_
+            n = tree.node_count
+            node_ids = np.arange(n)
+            is_leaf = tree.children_left == -1
+
+            feature = np.where(is_leaf, 0, tree.feature)
+            threshold = np.where(is_leaf, np.inf, tree.threshold)
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+
+            value = tree.value[:, 0, :n_classes].astype(np.float64)
+            totals = value.sum(axis=1, keepdims=True)
+            value = np.divide(value, totals, out=np.zeros_like(value), where=totals > 0)
+
+            features.append(feature)
+            thresholds.append(threshold)
+            children.append(np.stack([left, right], axis=1).ravel())
+            values.append(value)
+            roots.append(offset)
+            missing_left.append(np.asarray(getattr(tree, "missing_go_to_left", np.ones(n)), dtype=bool))
+
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            children=np.concatenate(children),
+            value=np.concatenate(values),
+            roots=np.asarray(roots),
+            classes_=np.asarray(model.classes_),
+            missing_left=np.concatenate(missing_left),
+            max_depth=max_depth,
+            n_features_in_=model.n_features_in_,
+            metadata={"source": type(model).__name__},
+        )
+
+    def fold_scaler(self, scaler: Any) -> "CompiledForest":
+        """
+        Returns a copy whose thresholds live in raw feature space.
+
+        Trees only ask `(x - mean) / scale <= t`, which for a positive scale is
+        `x <= t * scale + mean`, so the scaler can be applied once to the
+        thresholds instead of to every request. The cut is solved exactly
+        (including sklearn's float32 rounding of the scaled value), so the
+        folded forest makes the same split decisions as scaler + forest.
+        """
+        if self.scaler_folded:
+            raise ValueError("Scaler is already folded into this forest")
+
+        mean = getattr(scaler, "mean_", None)
+        scale = getattr(scaler, "scale_", None)
+        mean = np.zeros(self.n_features_in_) if mean is None else np.asarray(mean, dtype=np.float64)
+        scale = np.ones(self.n_features_in_) if scale is None else np.asarray(scale, dtype=np.float64)
+
+        threshold = self.threshold.copy()
+        split = np.isfinite(threshold)
+        threshold[split] = _raw_threshold(threshold[split], mean[self.feature[split]], scale[self.feature[split]])
+        return CompiledForest(
+            feature=self.feature,
+            threshold=threshold,
+            children=self.children,
+            value=self.value,
+            roots=self.roots,
+            classes_=self.classes_,
+            missing_left=self.missing_left,
+            max_depth=self.max_depth,
+            n_features_in_=self.n_features_in_,
+            scaler_folded=True,
+            metadata={**self.metadata, "scaler": type(scaler).__name__},
+        )
+
+    def node_depths(self) -> np.ndarray:
+        """Depth of every node reachable from a root; -1 for unreachable nodes."""
+        depth = np.full(self.n_nodes, -1, dtype=np.int64)
+        frontier = np.asarray(self.roots, dtype=np.intp)
+        level = 0
+        while frontier.size:
+            depth[frontier] = level
+            pairs = np.asarray(self.children, dtype=np.intp).reshape(-1, 2)[frontier]
+            internal = pairs[:, 0] != frontier
+            frontier = pairs[internal].ravel()
+            level += 1
+        return depth
+
+    def compress(self, n_trees: Optional[int] = None, max_depth: Optional[int] = None,
+                 threshold_dtype: Any = np.float64, value_dtype: Any = np.float64) -> "CompiledForest":
+        """
+        Returns a smaller forest: the first `n_trees` trees, with every node at
+        `max_depth` turned into a leaf carrying its own class distribution,
+        unreachable nodes dropped and arrays stored in compact dtypes.
+        Accuracy is not checked here; see scripts/compress_forest.py.
+        """
+        roots = np.asarray(self.roots[:n_trees] if n_trees else self.roots, dtype=np.intp)
+        pairs = np.asarray(self.children, dtype=np.intp).reshape(-1, 2).copy()
+        threshold = np.asarray(self.threshold, dtype=np.float64).copy()
+        node_ids = np.arange(self.n_nodes)
+
+        depth = self.node_depths()
+        if max_depth is not None:
+            cut = depth == max_depth
+            pairs[cut] = node_ids[cut, None]
+            threshold[cut] = np.inf
+
+        reachable = np.zeros(self.n_nodes, dtype=bool)
+        frontier = roots
+        while frontier.size:
+            reachable[frontier] = True
+            next_nodes = pairs[frontier]
+            frontier = next_nodes[next_nodes[:, 0] != frontier].ravel()
+
+        keep = np.flatnonzero(reachable)
+        new_id = np.full(self.n_nodes, -1, dtype=np.int64)
+        new_id[keep] = np.arange(len(keep))
+
+        index_dtype = np.int32 if 2 * len(keep) < np.iinfo(np.int32).max else np.intp
+        feature_dtype = np.int8 if self.n_features_in_ <= np.iinfo(np.int8).max else index_dtype
+        kept_depth = depth[keep]
+
+        return CompiledForest(
+            feature=np.asarray(self.feature)[keep].astype(feature_dtype),
+            threshold=threshold[keep].astype(threshold_dtype),
+            children=new_id[pairs[keep]].ravel().astype(index_dtype),
+            value=np.asarray(self.value)[keep].astype(value_dtype),
+            roots=new_id[roots].astype(index_dtype),
+            classes_=self.classes_,
+            missing_left=np.asarray(self.missing_left)[keep],
+            max_depth=min(self.max_depth, max_depth) if max_depth is not None else int(kept_depth.max()),
+            n_features_in_=self.n_features_in_,
+            scaler_folded=self.scaler_folded,
+            metadata={
+                **self.metadata,
+                "compressed": {
+                    "n_trees": len(roots),
+                    "max_depth": max_depth,
+                    "threshold_dtype": np.dtype(threshold_dtype).name,
+                    "value_dtype": np.dtype(value_dtype).name,
+                },
+            },
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(np.asarray(getattr(self, name)).nbytes for name in self.ARRAY_FIELDS))
+
+    def _prepare_input(self, X: Any) -> np.ndarray:
+        if self.scaler_folded:
+            X = np.asarray(X, dtype=np.float64)
+        else:
+            # sklearn trees compare float32 inputs against float64 thresholds;
+            # round the same way so split decisions match exactly.
+            X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got {X.shape[1]}")
+        return X
+
+    def apply(self, X: Any) -> np.ndarray:
+        """Returns the global leaf index reached in every tree, shape (n_trees, n_samples)."""
+        X = self._prepare_input(X)
+        return self._walk(X)
+
+    def _step(self, flat_X: np.ndarray, row_offsets: np.ndarray, nodes: np.ndarray, has_nan: bool) -> np.ndarray:
+        x = flat_X[row_offsets + self.feature[nodes]]
+        go_right = x > self.threshold[nodes]
+        if has_nan:
+            go_right = np.where(np.isnan(x), ~self.missing_left[nodes], go_right)
+        return self.children[2 * nodes + go_right]
+
+    def _walk(self, X: np.ndarray) -> np.ndarray:
+        n_samples, n_features = X.shape
+        flat_X = X.ravel()
+        has_nan = bool(np.isnan(flat_X).any())
+        row_offsets = (np.arange(n_samples) * n_features)[None, :]
+        nodes = np.repeat(self.roots[:, None], n_samples, axis=1)
+        for _ in range(self.max_depth):
+            nodes = self._step(flat_X, row_offsets, nodes, has_nan)
+        return nodes
+
+    def predict_proba(self, X: Any, chunk_size: int = 256) -> np.ndarray:
+        X = self._prepare_input(X)
+        n_samples = X.shape[0]
+        n_classes = self.value.shape[1]
+        proba = np.empty((n_samples, n_classes), dtype=np.float64)
+
+        for start in range(0, n_samples, chunk_size):
+            chunk = X[start:start + chunk_size]
+            leaves = self._walk(chunk)
+            proba[start:start + len(chunk)] = self.value[leaves].sum(axis=0, dtype=np.float64)
+
+        proba /= self.n_trees
+        return proba
+
+    def explain(self, X: Any, class_index: Optional[np.ndarray] = None,
+                chunk_size: int = 256) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Per-feature contributions by decision-path attribution (Saabas): every
+        split moves the class distribution from the node's value to its
+        child's, and that change is credited to the split feature.
+
+        Returns (proba, bias, contributions) where contributions has shape
+        (n_samples, n_features) and is taken for `class_index` (default: the
+        predicted class), so bias + contributions.sum(axis=1) equals
+        proba[i, class_index[i]]. One walk per chunk serves both outputs.
+        """
+        X = self._prepare_input(X)
+        n_samples, n_features = X.shape
+        proba = np.empty((n_samples, self.value.shape[1]), dtype=np.float64)
+        bias = np.empty(n_samples, dtype=np.float64)
+        contributions = np.empty((n_samples, n_features), dtype=np.float64)
+        chosen = np.empty(n_samples, dtype=np.intp)
+
+        for start in range(0, n_samples, chunk_size):
+            chunk = X[start:start + chunk_size]
+            n = len(chunk)
+            flat_X = chunk.ravel()
+            has_nan = bool(np.isnan(flat_X).any())
+            row_offsets = (np.arange(n) * n_features)[None, :]
+            nodes = np.repeat(self.roots[:, None], n, axis=1)
+            path = [nodes]
+            for _ in range(self.max_depth):
+                nodes = self._step(flat_X, row_offsets, nodes, has_nan)
+                path.append(nodes)
+
+            rows = slice(start, start + n)
+            proba[rows] = self.value[nodes].sum(axis=0, dtype=np.float64) / self.n_trees
+            cls = proba[rows].argmax(axis=1) if class_index is None else np.asarray(class_index)[rows]
+            chosen[rows] = cls
+
+            # Value of the chosen class at every node on every path: (depth + 1, n_trees, n).
+            path_value = self.value[np.stack(path), cls[None, None, :]].astype(np.float64)
+            bias[rows] = path_value[0].mean(axis=0)
+            # Leaves loop onto themselves, so steps past a leaf add exactly zero.
+            delta = np.diff(path_value, axis=0)
+            cells = row_offsets[None] + self.feature[np.stack(path[:-1])]
+            contributions[rows] = np.bincount(cells.ravel(), weights=delta.ravel(),
+                                              minlength=n * n_features).reshape(n, n_features) / self.n_trees
+
+        return proba, bias, contributions
+
+    def predict(self, X: Any) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def save(self, path: str):
+        """Writes a directory of .npy arrays plus a manifest.json describing them."""
+        target = Path(path)
+        staging = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+        if staging.exists():
+            shutil.rmtree(staging)
+        staging.mkdir(parents=True)
+
+        manifest = {
+            "format": self.FORMAT,
+            "format_version": self.FORMAT_VERSION,
+            "max_depth": self.max_depth,
+            "n_features_in_": self.n_features_in_,
+            "n_trees": self.n_trees,
+            "n_nodes": self.n_nodes,
+            "scaler_folded": self.scaler_folded,
+            "fingerprint": self.fingerprint,
+            "metadata": self.metadata,
+            "arrays": {},
+        }
+        for name in self.ARRAY_FIELDS:
+            array = np.ascontiguousarray(getattr(self, name))
+            np.save(staging / f"{name}.npy", array, allow_pickle=False)
+            manifest["arrays"][name] = {"file": f"{name}.npy", "dtype": array.dtype.str, "shape": list(array.shape)}
+
+        with open(staging / "manifest.json", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(staging, target)
+        logger.info(f"Compiled forest saved to {path} ({self.n_trees} trees, {self.n_nodes} nodes)")
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "CompiledForest":
+        """Opens a saved forest; with `mmap` only the manifest is read up front."""
+        root = Path(path)
+        with open(root / "manifest.json", "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != cls.FORMAT or manifest.get("format_version") != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported forest artifact at {path}: {manifest.get('format')} "
+                             f"v{manifest.get('format_version')}")
+
+        mmap_mode = "r" if mmap else None
+        arrays = {
+            name: np.load(root / spec["file"], mmap_mode=mmap_mode, allow_pickle=False)
+            for name, spec in manifest["arrays"].items()
+        }
+        return cls(
+            max_depth=manifest["max_depth"],
+            n_features_in_=manifest["n_features_in_"],
+            scaler_folded=manifest["scaler_folded"],
+            metadata=manifest.get("metadata"),
+            fingerprint=manifest.get("fingerprint"),
+            **arrays,
+        )
@@ -0,0 +1,174 @@
+import csv
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from modules.core.config import settings
+from modules.core.logger import get_logger
+
+logger = get_logger("Geocoding")
+
+Coordinates = Tuple[float, float]
+
+# Words that do not change which place is meant ("Nashik District, Maharashtra, India").
+_NOISE_WORDS = {"district", "dist", "city", "mandi", "apmc", "india", "bharat"}
+# Tie-break when one name is several things (Mandi town vs. district, Delhi state vs. city).
+_KIND_PRIORITY = {"district": 0, "mandi": 1, "town": 1, "state": 2}
+
+def normalize_name(name: str) -> str:
+    """Lower-cased, punctuation-free, single-spaced name with noise words dropped."""
+    words = re.sub(r"[^a-z0-9 ]+", " ", name.lower()).split()
+    kept = [w for w in words if w not in _NOISE_WORDS]
+    return " ".join(kept or words)
+
+class Gazetteer:
+    """
+    Offline index of Indian states, district headquarters and mandi towns.
+
+    Every place is keyed on its normalized name and on "name state", so
+    "Nashik", "nashik district" and "Nashik, Maharashtra" all resolve with one
+    dict lookup. A sorted copy of the keys backs prefix suggestions.
+    """
+
+    def __init__(self, rows: List[Dict[str, str]]):
+        self.places: List[Dict] = []
+        self._index: Dict[str, List[Dict]] = {}
+        for row in rows:
+            place = {"name": row["name"].strip(), "kind": row["kind"].strip(), "state": row["state"].strip(),
+                     "lat": float(row["lat"]), "lon": float(row["lon"])}
+            self.places.append(place)
+            name, state = normalize_name(place["name"]), normalize_name(place["state"])
+            for key in {name, f"{name} {state}"}:
+                self._index.setdefault(key, []).append(place)
+        for matches in self._index.values():
+            matches.sort(key=lambda p: _KIND_PRIORITY.get(p["kind"], 3))
+        self._keys = sorted(self._index)
+
+    @classmethod
+    def load(cls, path: str = settings.GAZETTEER_PATH) -> "Gazetteer":
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls(list(csv.DictReader(f)))
+
+    def __len__(self) -> int:
+        return len(self.places)
+
+    def find(self, query: str) -> Optional[Dict]:
+        """Best matching place for a free-text query, or None."""
+        key = normalize_name(query)
+        matches = self._index.get(key)
+        if matches:
+            return matches[0]
+        # "Place, State" where the state was written differently: match the
+        # place and keep the candidate whose state appears in the query.
+        head = normalize_name(query.split(",")[0])
+        for place in self._index.get(head, []):
+            if normalize_name(place["state"]) in key:
+                return place
+        return None
+
+    def lookup(self, query: str) -> Optional[Coordinates]:
+        place = self.find(query)
+        return (place["lat"], place["lon"]) if place else None
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """Places whose normalized name starts with `prefix`, for autocomplete."""
+        prefix = normalize_name(prefix)
+        if not prefix:
+            return []
+        seen, results = set(), []
+        for key in self._keys[bisect_left(self._keys, prefix):]:
+            if not key.startswith(prefix) or len(results) >= limit:
+                break
+            for place in self._index[key]:
+                if id(place) not in seen:
+                    seen.add(id(place))
+                    results.append(place)
+        return results[:limit]
+
+class GeocodeCache:
+    """
+    SQLite-backed geocode results shared by every process on the host.
+
+    WAL mode lets readers run while another process writes. Misses from the
+    remote geocoder are stored too, with a shorter lifetime, so a typo is not
+    re-sent through the rate limiter on every request.
+    """
+
+    def __init__(self, path: str = settings.GEOCODE_CACHE_PATH,
+                 ttl_seconds: float = settings.GEOCODE_CACHE_TTL_SECONDS,
+                 negative_ttl_seconds: float = settings.GEOCODE_NEGATIVE_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS geocode ("
+                         "query TEXT PRIMARY KEY, lat REAL, lon REAL, stored_at REAL NOT NULL)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, query: str) -> Tuple[bool, Optional[Coordinates]]:
+        """(found, coordinates); coordinates is None for a cached miss."""
+        row = self._connection().execute("SELECT lat, lon, stored_at FROM geocode WHERE query = ?",
+                                         (normalize_name(query),)).fetchone()
+        if row is None:
+            return False, None
+        lat, lon, stored_at = row
+        ttl = self.negative_ttl_seconds if lat is None else self.ttl_seconds
+        if time.time() - stored_at > ttl:
+            return False, None
+        return True, None if lat is None else (lat, lon)
+
+    def put(self, query: str, coords: Optional[Coordinates]):
+        lat, lon = coords if coords else (None, None)
+        with self._connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO geocode (query, lat, lon, stored_at) VALUES (?, ?, ?, ?)",
+                         (normalize_name(query), lat, lon, time.time()))
+
+    def stats(self) -> Dict[str, int]:
+        hits, misses = self._connection().execute(
+            "SELECT COUNT(lat), COUNT(*) - COUNT(lat) FROM geocode").fetchone()
+        return {"cached": hits, "negative": misses}
+
+_gazetteer: Optional[Gazetteer] = None
+_geocode_cache: Optional[GeocodeCache] = None
+_geocoding_lock = threading.Lock()
+
+def get_gazetteer() -> Optional[Gazetteer]:
+    """Process-wide gazetteer from GAZETTEER_PATH; None if the file is missing."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _geocoding_lock:
+            if _gazetteer is None:
+                try:
+                    _gazetteer = Gazetteer.load()
+                    logger.info(f"Gazetteer loaded with {len(_gazetteer)} places")
+                except Exception as e:
+                    logger.warning(f"Offline gazetteer disabled: {e}")
+                    return None
+    return _gazetteer
+
+def get_geocode_cache() -> Optional[GeocodeCache]:
+    """Process-wide handle on the shared geocode cache; None if it cannot be opened."""
+    global _geocode_cache
+    if _geocode_cache is None:
+        with _geocoding_lock:
+            if _geocode_cache is None:
+                try:
+                    _geocode_cache = GeocodeCache()
+                except Exception as e:
+                    logger.warning(f"Persistent geocode cache disabled: {e}")
+                    return None
+    return _geocode_cache
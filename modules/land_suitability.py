@@ -1,102 +1,104 @@
+import calendar
+import time
 import streamlit as st
-import requests
 import numpy as np
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
 from streamlit_folium import st_folium
 import folium
+from folium.plugins import HeatMap
 from typing import Dict, List, Any
+from modules.climatology import RAIN, get_climatology
+from modules.core.config import settings
 from modules.core.logger import get_logger
+from modules.crop_envelopes import get_crop_envelopes
+from modules.spatial_index import get_location_index
+from modules.weather_client import ForecastCache, get_weather_client
 
 logger = get_logger(__name__)
 
+# Shared across map clicks; each click uses at most two workers.
+_provider_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="land-provider")
+
+DAYS_PER_MONTH = 365.25 / 12
+
+# (temp, rain) per grid cell, shared by every heatmap request in the process.
+_climate_cache = ForecastCache(max_size=settings.LAND_CLIMATE_CACHE_SIZE)
+
 class LandSuitabilityAnalyzer:
 
     def __init__(self):
 
-        self.crop_requirements = {
-            "Wheat": {"temp": [10, 25], "rain": 50},
-            "Rice": {"temp": [20, 35], "rain": 150},
-            "Maize": {"temp": [18, 30], "rain": 60},
-            "Cotton": {"temp": [22, 32], "rain": 70},
-            "Sugarcane": {"temp": [20, 35], "rain": 120},
-            "Soybean": {"temp": [20, 30], "rain": 80},
-        }
+        # Percentile envelopes of the recommendation model's training data.
+        self.envelopes = get_crop_envelopes()
+        self.crops = [crop.title() for crop in self.envelopes.crops]
 
         self.headers = {
             "User-Agent": "CropVanta/1.0"
         }
 
-    def fetch_open_meteo(self, lat, lon):
+    def fetch_open_meteo(self, lat, lon, deadline=None):
+
+        return self.fetch_open_meteo_many([(lat, lon)], deadline)[0]
+
+    def fetch_open_meteo_many(self, coords, deadline=None):
 
         try:
 
-            url = (
-                "https://api.open-meteo.com/v1/forecast"
-                f"?latitude={lat}"
-                f"&longitude={lon}"
-                "&daily=temperature_2m_max,precipitation_sum"
-                "&timezone=auto"
+            payloads = get_weather_client().fetch_many(
+                coords,
+                deadline=deadline,
+                daily="temperature_2m_max,precipitation_sum",
+                timezone="auto"
             )
 
-            r = requests.get(url, timeout=8, headers=self.headers)
-
-            if r.status_code != 200:
-                logger.warning("Open Meteo returned non-200 response")
-                return None
+        except Exception as e:
+            logger.error(f"Open Meteo API failed: {e}")
+            return [None] * len(coords)
 
-            data = r.json()
+        return [self._summarize_open_meteo(data) for data in payloads]
 
-            if "daily" not in data:
-                logger.warning("Open Meteo missing daily data")
-                return None
+    def _summarize_open_meteo(self, data):
 
-            temps = data["daily"].get("temperature_2m_max", [])
-            rains = data["daily"].get("precipitation_sum", [])
+        if data is None:
+            return None
 
-            if not temps or not rains:
-                return None
+        if "daily" not in data:
+            logger.warning("Open Meteo missing daily data")
+            return None
 
-            return {
-                "temp": float(np.mean(temps)),
-                "rain": float(np.sum(rains)),
-                "source": "Open-Meteo"
-            }
+        temps = data["daily"].get("temperature_2m_max", [])
+        rains = data["daily"].get("precipitation_sum", [])
 
-        except Exception as e:
-            logger.error(f"Open Meteo API failed: {e}")
+        if not temps or not rains:
             return None
 
-    def fetch_nasa_power(self, lat, lon):
+        return {
+            "temp": float(np.mean(temps)),
+            "rain": float(np.sum(rains)),
+            "source": "Open-Meteo"
+        }
 
-        try:
+    def fetch_nasa_power(self, lat, lon, deadline=None):
 
-            url = (
-                "https://power.larc.nasa.gov/api/temporal/daily/point"
-                f"?parameters=T2M,PRECTOT"
-                f"&community=AG"
-                f"&longitude={lon}"
-                f"&latitude={lat}"
-                "&format=JSON"
-            )
+        try:
 
-            r = requests.get(url, timeout=10, headers=self.headers)
+            normals = self.fetch_climatology(lat, lon, deadline)
 
-            if r.status_code != 200:
-                logger.warning("NASA API returned non-200 response")
+            if not normals:
                 return None
 
-            data = r.json()
+            month = datetime.now().month - 1
+            temp = normals["temp"][month]
+            rain = normals["rain"][month]
 
-            params = data.get("properties", {}).get("parameter", {})
-
-            temps = list(params.get("T2M", {}).values())
-            rains = list(params.get("PRECTOT", {}).values())
-
-            if not temps or not rains:
+            if np.isnan(temp) or np.isnan(rain):
                 return None
 
+            # Monthly normal scaled to the 7-day window Open-Meteo reports.
             return {
-                "temp": float(np.mean(temps)),
-                "rain": float(np.sum(rains)),
+                "temp": float(temp),
+                "rain": float(rain) * 7 / calendar.monthrange(datetime.now().year, month + 1)[1],
                 "source": "NASA POWER"
             }
 
@@ -104,19 +106,28 @@ class LandSuitabilityAnalyzer:
             logger.error(f"NASA API failed: {e}")
             return None
 
-    def fetch_geo_data(self, lat, lon):
+    def fetch_climatology(self, lat, lon, deadline=None):
+        """Monthly normals for the location's grid cell; fetched from NASA POWER once per cell."""
 
-        try:
+        store = get_climatology()
 
-            data = self.fetch_open_meteo(lat, lon)
+        return store.normals(lat, lon, deadline=deadline) if store else None
 
-            if data:
-                data["success"] = True
-                return data
+    def fetch_geo_data(self, lat, lon, hedge_after=settings.LAND_HEDGE_AFTER_SECONDS,
+                       deadline=settings.LAND_FETCH_DEADLINE_SECONDS):
+        """
+        Hedged fetch: Open-Meteo first, NASA POWER as well if Open-Meteo has
+        not answered within `hedge_after` seconds (0 fires both at once,
+        None waits for Open-Meteo before trying NASA). The first valid answer
+        wins; after `deadline` seconds the fallback values are returned.
+        """
 
-            logger.info("Fallback to NASA POWER")
+        try:
 
-            data = self.fetch_nasa_power(lat, lon)
+            if hedge_after is None:
+                data = self.fetch_open_meteo(lat, lon) or self.fetch_nasa_power(lat, lon)
+            else:
+                data = self._hedged_fetch(lat, lon, hedge_after, deadline)
 
             if data:
                 data["success"] = True
@@ -142,19 +153,90 @@ class LandSuitabilityAnalyzer:
                 "success": True
             }
 
-    def calculate_suitability(self, temp, rain):
+    def _hedged_fetch(self, lat, lon, hedge_after, deadline):
 
-        results = []
+        start = time.monotonic()
+        providers = [self.fetch_open_meteo, self.fetch_nasa_power]
+        # Each call gets what is left of the hedge budget as its HTTP
+        # deadline, so a loser frees its worker by the time this click gives
+        # up instead of holding it for the provider's own (longer) deadline.
+        def submit():
+            budget = max(deadline - (time.monotonic() - start), 0.1)
+            return _provider_pool.submit(providers.pop(0), lat, lon, budget)
+
+        pending = {submit()}
+
+        if hedge_after <= 0:
+            pending.add(submit())
+
+        while pending:
+
+            remaining = deadline - (time.monotonic() - start)
+            if remaining <= 0:
+                logger.warning(f"No provider answered within {deadline}s")
+                break
+
+            wait_for = min(remaining, max(hedge_after - (time.monotonic() - start), 0)) if providers else remaining
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                data = future.result()
+                if data:
+                    # A request already on the wire cannot be aborted; the
+                    # loser finishes within its budget and is dropped.
+                    for loser in pending:
+                        loser.cancel()
+                    return data
+
+            if providers and (not pending or time.monotonic() - start >= hedge_after):
+                logger.info("Primary provider slow or failed, hedging with NASA POWER")
+                pending.add(submit())
+
+        for loser in pending:
+            loser.cancel()
+        return None
+
+    def season_rainfall(self, lats, lons, rain_7d):
+        """
+        Rainfall on the envelopes' scale (mm/month over a growing season):
+        the climatology's monthly normals averaged over LAND_SEASON_MONTHS
+        from the current month, or the 7-day total as a monthly rate where
+        the cell has no normals. Inputs broadcast like numpy arrays.
+        """
+
+        rain = np.asarray(rain_7d, dtype=float) * DAYS_PER_MONTH / 7
+        store = get_climatology()
+
+        if store is None:
+            return rain
+
+        months = (datetime.now().month - 1 + np.arange(settings.LAND_SEASON_MONTHS)) % 12
+        normals = store.lookup(lats, lons)[..., months, RAIN].astype(float).mean(axis=-1)
+
+        return np.where(np.isnan(normals), rain, normals)
 
-        for crop, req in self.crop_requirements.items():
+    def score_cells(self, temp, rain, **soil):
+        """
+        Scores every cell x crop in one array operation as a graded distance
+        to each crop's envelope. `temp` and `rain` share any shape, with
+        `rain` in mm/month over the season (see season_rainfall); soil
+        arrays (N, P, K, humidity, ph) may be passed as well. The result has
+        one extra trailing crop axis and is NaN where a cell has no data.
+        """
 
-            score = 0
+        scores = self.envelopes.score(temperature=temp, rainfall=rain, **soil)
 
-            if req["temp"][0] <= temp <= req["temp"][1]:
-                score += 40
+        return self.crops, scores
 
-            if rain >= req["rain"]:
-                score += 60
+    def calculate_suitability(self, temp, rain, **soil):
+
+        crops, scores = self.score_cells(temp, rain, **soil)
+
+        results = []
+
+        for crop, score in zip(crops, scores.tolist()):
+
+            score = int(round(score))
 
             results.append({
                 "crop": crop,
@@ -164,6 +246,160 @@ class LandSuitabilityAnalyzer:
 
         return sorted(results, key=lambda x: x["score"], reverse=True)
 
+    def fetch_climate_grid(self, lats, lons):
+        """
+        Mean max temperature and total rain for every (lat, lon) cell, as two
+        (len(lats), len(lons)) arrays. Cached cells are read in one pass;
+        the rest go out as multi-location Open-Meteo batches. NaN marks
+        cells no batch answered for.
+        """
+
+        # Same 0.01 deg keys as coordinate_key, rounded once per axis.
+        lat_keys = np.round(lats, 2).tolist()
+        lon_keys = np.round(lons, 2).tolist()
+        keys = [(lat, lon) for lat in lat_keys for lon in lon_keys]
+
+        cached = _climate_cache.get_many(keys)
+        missing = [i for i, value in enumerate(cached) if value is None]
+        climate = np.array([(np.nan, np.nan) if value is None else value for value in cached], dtype=float)
+
+        if missing:
+            logger.info(f"Fetching climate for {len(missing)} of {len(keys)} grid cells")
+            for i, data in zip(missing, self.fetch_open_meteo_many([keys[i] for i in missing])):
+                if data:
+                    climate[i] = (data["temp"], data["rain"])
+                    _climate_cache.put(keys[i], (data["temp"], data["rain"]))
+
+        shape = (len(lats), len(lons))
+        return climate[:, 0].reshape(shape), climate[:, 1].reshape(shape)
+
+    def suitability_grid(self, south, west, north, east, resolution):
+        """Climate and crop scores for a bounding box sampled every `resolution` degrees."""
+
+        lats = np.round(np.arange(south, north + resolution / 2, resolution), 4)
+        lons = np.round(np.arange(west, east + resolution / 2, resolution), 4)
+
+        if len(lats) * len(lons) > settings.LAND_GRID_MAX_CELLS:
+            raise ValueError(
+                f"Grid of {len(lats)}x{len(lons)} cells exceeds {settings.LAND_GRID_MAX_CELLS}; "
+                "use a coarser resolution"
+            )
+
+        temp, rain = self.fetch_climate_grid(lats, lons)
+        season_rain = self.season_rainfall(lats[:, None], lons[None, :], rain)
+        crops, scores = self.score_cells(temp, season_rain)
+
+        return {
+            "lats": lats,
+            "lons": lons,
+            "temp": temp,
+            "rain": rain,
+            "season_rain": season_rain,
+            "crops": crops,
+            "scores": scores,
+        }
+
+def render_heatmap(grid, crop, bounds):
+
+    scores = grid["scores"][..., grid["crops"].index(crop)]
+    lat_idx, lon_idx = np.nonzero(~np.isnan(scores))
+
+    points = np.column_stack([
+        grid["lats"][lat_idx],
+        grid["lons"][lon_idx],
+        scores[lat_idx, lon_idx] / 100.0,
+    ]).tolist()
+
+    m = folium.Map()
+    m.fit_bounds(bounds)
+
+    HeatMap(points, min_opacity=0.2, max_val=1.0, radius=18, blur=12).add_to(m)
+
+    return m, len(points)
+
+def render_local_context(lat, lon):
+
+    index = get_location_index()
+
+    if index is None:
+        return
+
+    local = index.resolve(lat, lon, k_markets=settings.LAND_NEARBY_MARKETS)
+
+    if local["district"]:
+        district = local["district"]
+        st.write(f"📍 Nearest district HQ: **{district['name']}, {district['state']}** ({district['distance_km']} km)")
+
+    site = local["weather_site"]
+
+    if site:
+        history = index.weather_history(site)
+        where = f"{site['district']}, {site['state']}"
+        if site["placed_at"] == "state":
+            where += " (located at the state centroid)"
+        st.caption(
+            f"Recorded weather for {where}, {site['distance_km']} km away: "
+            f"{history['temperature'].mean():.1f}°C avg, {history['humidity'].mean():.0f}% humidity, "
+            f"{history['rainfall'].mean():.1f} mm/day over {len(history)} days"
+        )
+
+    if local["markets"]:
+        rows = []
+        for market in local["markets"]:
+            prices = index.market_prices(market)
+            latest = prices.sort_values("date").groupby("commodity").tail(1)
+            for price in latest.itertuples():
+                rows.append({
+                    "Market": f"{market['market']}, {market['district']}",
+                    "Km": market["distance_km"],
+                    "Commodity": price.commodity,
+                    "Modal Price": price.modal_price,
+                    "Date": price.date,
+                })
+        if rows:
+            st.markdown("**🏪 Nearby Mandi Prices**")
+            st.dataframe(rows, use_container_width=True)
+
+def run_heatmap():
+
+    st.subheader("🗺 Regional Suitability Heatmap")
+
+    c1, c2, c3, c4 = st.columns(4)
+    south = c1.number_input("South (lat)", value=21.5, step=0.5)
+    north = c2.number_input("North (lat)", value=24.5, step=0.5)
+    west = c3.number_input("West (lon)", value=74.5, step=0.5)
+    east = c4.number_input("East (lon)", value=78.5, step=0.5)
+
+    analyzer = LandSuitabilityAnalyzer()
+
+    c5, c6 = st.columns(2)
+    resolution = c5.select_slider("Resolution (degrees)", options=[0.05, 0.1, 0.25, 0.5], value=0.25)
+    crop = c6.selectbox("Crop", analyzer.crops)
+
+    if st.button("Build Heatmap"):
+
+        if south >= north or west >= east:
+            st.error("South/West must be smaller than North/East.")
+            return
+
+        try:
+            with st.spinner("Fetching climate for grid cells..."):
+                st.session_state.suitability_grid = {
+                    "grid": analyzer.suitability_grid(south, west, north, east, resolution),
+                    "bounds": [[south, west], [north, east]],
+                }
+        except ValueError as e:
+            st.error(str(e))
+            return
+
+    if "suitability_grid" in st.session_state:
+
+        cached = st.session_state.suitability_grid
+        heatmap, n_cells = render_heatmap(cached["grid"], crop, cached["bounds"])
+
+        st_folium(heatmap, width=700, height=450, key="suitability_heatmap")
+        st.caption(f"{crop} suitability over {n_cells} cells (brighter = more suitable)")
+
 def run():
 
     try:
@@ -185,6 +421,8 @@ def run():
 
             st.success(f"Selected Location: {lat:.4f}, {lon:.4f}")
 
+            render_local_context(lat, lon)
+
             analyzer = LandSuitabilityAnalyzer()
 
             geo_info = analyzer.fetch_geo_data(lat, lon)
@@ -198,7 +436,22 @@ def run():
                 f"📡 Source: {geo_info['source']}"
             )
 
-            rankings = analyzer.calculate_suitability(temp, rain)
+            store = get_climatology()
+            normals = store.normals(lat, lon, method="bilinear", fetch=False) if store else None
+
+            if normals:
+                month = datetime.now().month - 1
+                st.caption(
+                    f"Long-run normal for {calendar.month_name[month + 1]}: "
+                    f"{normals['temp'][month]:.1f}°C, {normals['rain'][month]:.0f} mm/month"
+                )
+
+            season_rain = float(analyzer.season_rainfall(lat, lon, rain))
+
+            st.caption(f"Scored on {season_rain:.0f} mm/month of seasonal rain "
+                       f"(next {settings.LAND_SEASON_MONTHS} months).")
+
+            rankings = analyzer.calculate_suitability(temp, season_rain)
 
             st.subheader("🌾 Crop Suitability Ranking")
 
@@ -215,6 +468,10 @@ def run():
                     f"({res['score']}/100)"
                 )
 
+        st.markdown("---")
+
+        run_heatmap()
+
     except Exception as e:
 
         logger.critical(f"UI Critical Error: {e}")
@@ -1,29 +1,118 @@
+import threading
+import numpy as np
 import pandas as pd
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 from modules.core.logger import get_logger
 from modules.market_sentiment import analyze_market_mood
 
 logger = get_logger("Market_Advisor")
 
+def _normalized_codes(column: pd.Series) -> Tuple[np.ndarray, List[str]]:
+    """Codes into lower-cased, stripped names; the string work runs once per distinct raw value."""
+    codes, raw = pd.factorize(column, use_na_sentinel=True)
+    normalized = pd.Index(raw.astype(str)).str.lower().str.strip()
+    norm_codes, names = pd.factorize(normalized)
+    codes = np.where(codes >= 0, norm_codes[np.maximum(codes, 0)], -1)
+    return codes, list(names)
+
+class MarketIndex:
+    """
+    Mandi price rows stably sorted by normalized (commodity, state), with the
+    row range of every pair and of every commodity kept in dicts. A query is
+    a dict lookup plus a slice; substring matching runs over the distinct
+    commodity names rather than over the rows.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        commodity_codes, self.commodities = _normalized_codes(df["commodity"])
+        state_codes, self.states = _normalized_codes(df["state"])
+
+        # Rows with a missing commodity or state can never match a query.
+        keep = (commodity_codes >= 0) & (state_codes >= 0)
+        key = commodity_codes.astype(np.int64) * (len(self.states) + 1) + state_codes
+        key = np.where(keep, key, np.iinfo(np.int64).max)
+        order = np.argsort(key, kind="stable")
+        order = order[keep[order]]
+
+        # Sorted copy with the normalized names as categoricals, which is
+        # what the legacy path displayed after lower-casing in place.
+        self.frame = df.iloc[order].reset_index(drop=True)
+        self.frame["commodity"] = pd.Categorical.from_codes(commodity_codes[order], self.commodities)
+        self.frame["state"] = pd.Categorical.from_codes(state_codes[order], self.states)
+        # Position in the source frame, to restore its order across ranges.
+        self.position = order
+
+        sorted_commodity = commodity_codes[order]
+        sorted_state = state_codes[order]
+        sorted_key = key[order]
+        starts = np.flatnonzero(np.r_[True, sorted_key[1:] != sorted_key[:-1]]) if len(order) else np.empty(0, int)
+        ends = np.r_[starts[1:], len(order)].astype(int)
+
+        self.pair_ranges: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        self.commodity_ranges: Dict[str, Tuple[int, int]] = {}
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            commodity = self.commodities[sorted_commodity[start]]
+            self.pair_ranges[(commodity, self.states[sorted_state[start]])] = (start, end)
+            first, _ = self.commodity_ranges.get(commodity, (start, end))
+            self.commodity_ranges[commodity] = (first, end)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def matching_commodities(self, crop: str) -> List[str]:
+        search = crop.lower().strip()
+        return [name for name in self.commodity_ranges if search in name]
+
+    def _take(self, ranges: List[Tuple[int, int]]) -> pd.DataFrame:
+        """Rows of several ranges in source order; a commodity range is sorted by state first."""
+        if not ranges:
+            return self.frame.iloc[:0]
+        rows = np.concatenate([np.arange(start, end) for start, end in ranges])
+        return self.frame.iloc[rows[np.argsort(self.position[rows], kind="stable")]]
+
+    def query(self, crop: str, state: Optional[str] = None) -> Tuple[pd.DataFrame, bool]:
+        """
+        Rows for a crop (substring of the commodity name) in a state, in the
+        source order. Falls back to every state when the state has none;
+        the flag says whether that fallback was used.
+        """
+        commodities = self.matching_commodities(crop)
+        if state:
+            search_state = state.lower().strip()
+            ranges = [self.pair_ranges[(c, search_state)] for c in commodities
+                      if (c, search_state) in self.pair_ranges]
+            if ranges:
+                if len(ranges) == 1:
+                    start, end = ranges[0]
+                    return self.frame.iloc[start:end], False
+                return self._take(ranges), False
+        ranges = [self.commodity_ranges[c] for c in commodities]
+        return self._take(ranges), bool(state)
+
 class MarketAdvisor:
+    def __init__(self):
+        self._index: Optional[MarketIndex] = None
+        self._indexed_frame: Optional[pd.DataFrame] = None
+        self._lock = threading.Lock()
+
+    def get_index(self, df: pd.DataFrame) -> MarketIndex:
+        """Index for `df`, rebuilt only when a different frame is passed in."""
+        with self._lock:
+            if self._indexed_frame is not df:
+                self._index = MarketIndex(df)
+                self._indexed_frame = df
+                logger.info(f"Market index built: {len(self._index)} rows, "
+                            f"{len(self._index.pair_ranges)} (commodity, state) pairs")
+            return self._index
+
     def process_market_data(self, df: pd.DataFrame, crop: str, state: Optional[str] = None) -> Dict:
         try:
             if df.empty:
                 return {"status": "error", "message": "Database is empty"}
 
-            df['commodity'] = df['commodity'].str.lower().str.strip()
-            df['state'] = df['state'].str.lower().str.strip()
-            
-            search_crop = crop.lower().strip()
-            search_state = state.lower().strip() if state else None
-
-            if search_state:
-                filtered_df = df[(df['commodity'].str.contains(search_crop)) & (df['state'] == search_state)]
-            else:
-                filtered_df = df[df['commodity'].str.contains(search_crop)]
+            filtered_df, fell_back = self.get_index(df).query(crop, state)
 
-            if filtered_df.empty:
-                filtered_df = df[df['commodity'].str.contains(search_crop)]
+            if fell_back:
                 logger.warning(f"No data for {crop} in {state}, showing national average.")
 
             if filtered_df.empty:
@@ -31,20 +120,20 @@ class MarketAdvisor:
 
             latest_price = filtered_df.iloc[-1]['modal_price']
             avg_price = filtered_df['modal_price'].mean()
-            
+
             sample_headlines = [f"{crop} market trend stable", f"Demand for {crop} remains steady in {state}"]
             sentiment = analyze_market_mood(sample_headlines)
 
             return {
                 "status": "success",
-                "data": filtered_df.tail(10), 
+                "data": filtered_df.tail(10),
                 "insights": {
                     "current_modal": latest_price,
                     "avg_price": round(avg_price, 2),
-                    "trend_sentiment": sentiment, 
+                    "trend_sentiment": sentiment,
                     "volatility": round(filtered_df['modal_price'].std(), 2) if len(filtered_df) > 1 else 0
                 }
             }
         except Exception as e:
             logger.error(f"Market Logic Error: {e}")
-            return {"status": "error", "message": "Market analysis failed. Please check CSV format."}
\ No newline at end of file
+            return {"status": "error", "message": "Market analysis failed. Please check CSV format."}
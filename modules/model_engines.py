@@ -0,0 +1,124 @@
+import os
+import shutil
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import joblib
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from modules.core.logger import get_logger
+from modules.forest_engine import CompiledForest
+
+logger = get_logger("Model_Engines")
+
+try:
+    import xgboost as xgb
+    XGBOOST_AVAILABLE = True
+except Exception:
+    XGBOOST_AVAILABLE = False
+
+class EngineSpec:
+    """How to build, search and serve one model family."""
+
+    def __init__(self, name: str, label: str, build: Callable[[int], Any],
+                 param_dist: Dict[str, List[Any]], available: bool = True, compiles: bool = False):
+        self.name = name
+        self.label = label
+        self.build = build
+        self.param_dist = param_dist
+        self.available = available
+        # Engines that compile to a CompiledForest are served from FOREST_PATH.
+        self.compiles = compiles
+
+def _build_xgboost(random_state: int) -> Any:
+    return xgb.XGBClassifier(tree_method="hist", eval_metric="mlogloss", random_state=random_state, n_jobs=-1)
+
+ENGINES: Dict[str, EngineSpec] = {
+    "random_forest": EngineSpec(
+        name="random_forest",
+        label="RandomForest",
+        build=lambda seed: RandomForestClassifier(random_state=seed, n_jobs=-1),
+        param_dist={
+            "n_estimators": [100, 200, 300, 500],
+            "max_depth": [None, 6, 10, 20, 30],
+            "min_samples_split": [2, 5, 10],
+            "min_samples_leaf": [1, 2, 4],
+            "bootstrap": [True, False],
+        },
+        compiles=True,
+    ),
+    "hist_gb": EngineSpec(
+        name="hist_gb",
+        label="HistGradientBoosting",
+        build=lambda seed: HistGradientBoostingClassifier(random_state=seed),
+        param_dist={
+            "learning_rate": [0.03, 0.1, 0.2],
+            "max_iter": [100, 200, 400],
+            "max_leaf_nodes": [15, 31, 63],
+            "min_samples_leaf": [5, 10, 20],
+            "l2_regularization": [0.0, 0.1, 1.0],
+        },
+    ),
+    "xgboost": EngineSpec(
+        name="xgboost",
+        label="XGBoost",
+        build=_build_xgboost,
+        param_dist={
+            "n_estimators": [100, 200, 400],
+            "max_depth": [3, 6, 8],
+            "learning_rate": [0.05, 0.1, 0.3],
+            "subsample": [0.8, 1.0],
+            "colsample_bytree": [0.8, 1.0],
+        },
+        available=XGBOOST_AVAILABLE,
+    ),
+}
+
+def get_engine(name: str) -> EngineSpec:
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine '{name}'. Choose from: {', '.join(ENGINES)}")
+    spec = ENGINES[name]
+    if not spec.available:
+        raise ValueError(f"Engine '{name}' is not installed")
+    return spec
+
+def available_engines() -> List[str]:
+    return [name for name, spec in ENGINES.items() if spec.available]
+
+def engine_of(model: Any) -> str:
+    """Engine name for a fitted estimator or a CompiledForest."""
+    if isinstance(model, CompiledForest) or isinstance(model, RandomForestClassifier):
+        return "random_forest"
+    if isinstance(model, HistGradientBoostingClassifier):
+        return "hist_gb"
+    if XGBOOST_AVAILABLE and isinstance(model, xgb.XGBClassifier):
+        return "xgboost"
+    return type(model).__name__
+
+def export_serving_model(model: Any, scaler: Any, model_path: str, scaler_path: str, forest_path: str):
+    """
+    Writes the artifacts CropAdvisor is served from. Forests also get the
+    folded CompiledForest; other engines remove it so a stale forest can
+    never shadow the pickle.
+    """
+    joblib.dump(model, model_path)
+    joblib.dump(scaler, scaler_path)
+    if ENGINES[engine_of(model)].compiles:
+        CompiledForest.from_sklearn(model).fold_scaler(scaler).save(forest_path)
+    elif os.path.isdir(forest_path):
+        shutil.rmtree(forest_path)
+        logger.info(f"Removed {forest_path}: {engine_of(model)} is served from {model_path}")
+
+def load_serving_model(model_path: str, scaler_path: str, forest_path: str) -> Tuple[Any, Optional[Any]]:
+    """Returns (model, scaler) for CropAdvisor; scaler is None when it is folded into the model."""
+    if os.path.isdir(forest_path):
+        model = CompiledForest.load(forest_path)
+    else:
+        model = joblib.load(model_path)
+        if engine_of(model) == "random_forest":
+            logger.warning(f"{forest_path} not found, compiling forest from {model_path}")
+            model = CompiledForest.from_sklearn(model)
+
+    if getattr(model, "scaler_folded", False):
+        return model, None
+    scaler = joblib.load(scaler_path)
+    if isinstance(model, CompiledForest):
+        return model.fold_scaler(scaler), None
+    return model, scaler
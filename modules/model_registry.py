@@ -0,0 +1,205 @@
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from modules.core.config import settings
+from modules.core.logger import get_logger
+from modules.model_engines import export_serving_model, load_serving_model
+
+logger = get_logger("Model_Registry")
+
+ACTIVE_FILE = "ACTIVE"
+
+def write_labels(labels: List[str], path: str = settings.LABELS_PATH):
+    """Writes a model's class id -> crop name list atomically."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(list(labels), f, indent=2)
+    os.replace(tmp_path, path)
+
+def load_legacy_labels(path: str = settings.LABELS_PATH) -> List[str]:
+    """Labels written next to MODEL_PATH by the export stage."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} is missing; rerun Modelcode.py to export labels with the model")
+    with open(path, "r") as f:
+        return json.load(f)
+
+class ModelBundle:
+    """
+    One servable model version: model, scaler, labels and metadata. A bundle
+    is fully loaded before anyone can see it and never changes afterwards;
+    a hot swap replaces the whole reference.
+    """
+
+    def __init__(self, version: str, model: Any, scaler: Any, labels: List[str], metadata: Dict[str, Any]):
+        classes = [int(c) for c in model.classes_]
+        if max(classes) >= len(labels):
+            raise ValueError(f"Bundle {version}: model has class id {max(classes)} but only {len(labels)} labels")
+        self.version = version
+        self.model = model
+        # Forests with the scaler folded into their thresholds take raw features.
+        self.scaler = None if getattr(model, "scaler_folded", False) else scaler
+        self.labels = list(labels)
+        self.metadata = metadata
+        self.crop_map = {c: labels[c].capitalize() for c in classes}
+        fingerprint = getattr(model, "fingerprint", None) or f"{type(model).__name__}-{id(model):x}"
+        self.model_version = f"{version}:{fingerprint}"
+
+    def label_names(self) -> List[str]:
+        return [self.crop_map[int(c)] for c in self.model.classes_]
+
+class ModelRegistry:
+    """
+    Directory of versioned bundles plus an ACTIVE pointer:
+
+        registry/<version>/{model.pkl, scaler.pkl, forest/, labels.json, metadata.json}
+        registry/ACTIVE
+
+    Bundles are written to a staging directory and renamed into place, and
+    ACTIVE is replaced atomically, so a reader never sees a partial version.
+    """
+
+    def __init__(self, root: str = settings.MODEL_REGISTRY_DIR):
+        self.root = Path(root)
+
+    def versions(self) -> List[str]:
+        if not self.root.is_dir():
+            return []
+        return sorted(p.name for p in self.root.iterdir()
+                      if p.is_dir() and not p.name.startswith(".") and (p / "labels.json").exists())
+
+    def active_version(self) -> Optional[str]:
+        try:
+            return (self.root / ACTIVE_FILE).read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _claim(self, staging: Path, version: Optional[str], metadata: Dict[str, Any]) -> str:
+        """
+        Renames a fully written staging directory to its version. An automatic
+        (timestamp, microsecond) name that is already taken, even by another
+        process in the same instant, gets a counter suffix instead of failing.
+        """
+        base = version or datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        for attempt in range(100):
+            candidate = base if attempt == 0 else f"{base}-{attempt:02d}"
+            target = self.root / candidate
+            if target.exists():
+                if version:
+                    raise ValueError(f"Model version {version} already exists in {self.root}")
+                continue
+            (staging / "metadata.json").write_text(json.dumps(dict(metadata, version=candidate), indent=4, default=str))
+            try:
+                os.replace(staging, target)
+                return candidate
+            except OSError:
+                # Another publisher took the name between the check and the rename.
+                if version:
+                    raise ValueError(f"Model version {version} already exists in {self.root}")
+        raise RuntimeError(f"Could not find a free version name for {base} in {self.root}")
+
+    def publish(self, model: Any, scaler: Any, labels: List[str], metadata: Dict[str, Any],
+                version: Optional[str] = None, activate: bool = False) -> str:
+        if version and (self.root / version).exists():
+            raise ValueError(f"Model version {version} already exists in {self.root}")
+
+        staging = self.root / f".staging-{os.getpid()}-{threading.get_ident()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        try:
+            export_serving_model(model, scaler, str(staging / "model.pkl"), str(staging / "scaler.pkl"),
+                                 str(staging / "forest"))
+            (staging / "labels.json").write_text(json.dumps(list(labels), indent=2))
+            version = self._claim(staging, version, metadata)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        logger.info(f"Published model version {version} to {self.root}")
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version: str):
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version: {version}")
+        tmp_path = self.root / f".{ACTIVE_FILE}.{os.getpid()}.tmp"
+        tmp_path.write_text(version)
+        os.replace(tmp_path, self.root / ACTIVE_FILE)
+        logger.info(f"Activated model version {version}")
+
+    def load(self, version: str) -> ModelBundle:
+        path = self.root / version
+        model, scaler = load_serving_model(str(path / "model.pkl"), str(path / "scaler.pkl"), str(path / "forest"))
+        labels = json.loads((path / "labels.json").read_text())
+        metadata = json.loads((path / "metadata.json").read_text())
+        return ModelBundle(version, model, scaler, labels, metadata)
+
+    def load_active(self) -> Optional[ModelBundle]:
+        version = self.active_version()
+        return self.load(version) if version else None
+
+def load_legacy_bundle() -> ModelBundle:
+    """The fixed MODEL_PATH/SCALER_PATH/FOREST_PATH/LABELS_PATH artifacts, for trees without a registry."""
+    model, scaler = load_serving_model(settings.MODEL_PATH, settings.SCALER_PATH, settings.FOREST_PATH)
+    metadata = {}
+    if os.path.exists(settings.MODEL_METADATA_PATH):
+        with open(settings.MODEL_METADATA_PATH, "r") as f:
+            metadata = json.load(f)
+    return ModelBundle("legacy", model, scaler, load_legacy_labels(), metadata)
+
+def load_serving_bundle(registry: Optional[ModelRegistry] = None) -> ModelBundle:
+    """The registry's active bundle, falling back to the legacy model files."""
+    registry = registry or ModelRegistry()
+    bundle = registry.load_active()
+    if bundle is None:
+        logger.info(f"No active version in {registry.root}, serving {settings.MODEL_PATH}")
+        return load_legacy_bundle()
+    return bundle
+
+class RegistryWatcher:
+    """
+    Polls the ACTIVE pointer on a daemon thread. When it moves, the new bundle
+    is loaded completely off the request path and handed to `on_change`; if
+    loading fails the current bundle keeps serving.
+    """
+
+    def __init__(self, registry: ModelRegistry, on_change: Callable[[ModelBundle], None],
+                 current_version: Optional[str] = None,
+                 poll_seconds: float = settings.MODEL_REGISTRY_POLL_SECONDS):
+        self.registry = registry
+        self.on_change = on_change
+        self.current_version = current_version
+        self.poll_seconds = poll_seconds
+        self._failed_version: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="model-registry-watcher", daemon=True)
+
+    def start(self) -> "RegistryWatcher":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def check(self) -> bool:
+        """One poll; returns True when a new bundle was swapped in."""
+        version = self.registry.active_version()
+        if not version or version in (self.current_version, self._failed_version):
+            return False
+        try:
+            bundle = self.registry.load(version)
+            self.on_change(bundle)
+        except Exception as e:
+            logger.error(f"Could not swap to model version {version}: {e}")
+            self._failed_version = version
+            return False
+        self.current_version = version
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            self.check()
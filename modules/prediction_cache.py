@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from modules.core.config import settings
+from modules.core.logger import get_logger
+from modules.core.schemas import CropInput
+
+logger = get_logger("Prediction_Cache")
+
+# Smallest meaningful difference for each field of a soil/lab report.
+FEATURE_PRECISION = {
+    "nitrogen": 1.0,
+    "phosphorus": 1.0,
+    "potassium": 1.0,
+    "temperature": 0.1,
+    "humidity": 1.0,
+    "ph": 0.05,
+    "rainfall": 1.0,
+}
+
+def quantize_input(data: CropInput) -> Tuple[int, ...]:
+    """Maps a CropInput onto its measurement grid so near-identical submissions share a key."""
+    return tuple(int(round(getattr(data, field) / step)) for field, step in FEATURE_PRECISION.items())
+
+def dequantize_key(key: Tuple[int, ...]) -> Tuple[float, ...]:
+    """Grid point a quantized key stands for, in FEATURE_PRECISION order."""
+    return tuple(k * step for k, step in zip(key, FEATURE_PRECISION.values()))
+
+def quantize_batch(features: np.ndarray) -> np.ndarray:
+    """Vectorized dequantize_key(quantize_input(...)) for an (n, 7) array in FEATURE_PRECISION order."""
+    steps = np.array(list(FEATURE_PRECISION.values()))
+    return np.round(features / steps) * steps
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache with a TTL, bound to a single model version.
+
+    A lookup made with a different model version drops every entry first, so
+    swapping the model can never serve a stale prediction.
+    """
+
+    def __init__(self, max_size: int = settings.PREDICTION_CACHE_SIZE,
+                 ttl_seconds: float = settings.PREDICTION_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._model_version: Optional[str] = None
+        # Version replaced by rebind(); requests still holding it miss without flushing the cache.
+        self._retired_version: Optional[str] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, model_version: str):
+        if model_version != self._model_version:
+            if self._entries:
+                logger.info(f"Model version changed to {model_version}, dropping {len(self._entries)} cached predictions")
+                self.invalidations += 1
+            self._entries.clear()
+            self._model_version = model_version
+
+    def get(self, key: Hashable, model_version: str) -> Optional[Any]:
+        with self._lock:
+            if model_version == self._retired_version:
+                self.misses += 1
+                return None
+            self._check_version(model_version)
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, model_version: str, value: Any):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if model_version == self._retired_version:
+                return
+            self._check_version(model_version)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def hot_keys(self, limit: int) -> List[Hashable]:
+        """Most recently used keys, newest first."""
+        with self._lock:
+            return list(reversed(self._entries))[:limit]
+
+    def rebind(self, model_version: str, entries: Dict[Hashable, Any]):
+        """Switches to a new model version, pre-filled with `entries`, in one step."""
+        with self._lock:
+            self._retired_version = self._model_version
+            self._model_version = model_version
+            expires = time.monotonic() + self.ttl_seconds
+            self._entries = OrderedDict((key, (expires, value)) for key, value in reversed(list(entries.items())))
+            logger.info(f"Cache rebound to {model_version} with {len(entries)} pre-scored entries")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "model_version": self._model_version,
+        }
@@ -0,0 +1,209 @@
+import math
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from modules.core.config import settings
+from modules.core.logger import get_logger
+from modules.geocoding import Gazetteer, get_gazetteer
+
+logger = get_logger("Spatial_Index")
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# Below this many points one vectorized pass beats walking grid rings.
+BRUTE_FORCE_MAX_POINTS = 256
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+class GridIndex:
+    """
+    Uniform lat/lon bucket grid for k-nearest-point queries.
+
+    A query scans square rings of cells outward from its own cell and stops
+    once the k-th best great-circle distance is closer than anything an
+    unscanned ring could hold, so a lookup touches a handful of buckets.
+    """
+
+    def __init__(self, lats: Sequence[float], lons: Sequence[float], cell_deg: float = settings.SPATIAL_CELL_DEGREES):
+        self.lats = np.asarray(lats, dtype=float)
+        self.lons = np.asarray(lons, dtype=float)
+        self.cell_deg = cell_deg
+        buckets = defaultdict(list)
+        for idx, key in enumerate(zip(np.floor(self.lats / cell_deg).astype(int).tolist(),
+                                      np.floor(self.lons / cell_deg).astype(int).tolist())):
+            buckets[key].append(idx)
+        self._buckets = {key: np.array(members) for key, members in buckets.items()}
+        self._phi = np.radians(self.lats)
+        self._lam = np.radians(self.lons)
+        self._cos_phi = np.cos(self._phi)
+        keys = np.array(list(self._buckets) or [(0, 0)])
+        self._key_min, self._key_max = keys.min(axis=0), keys.max(axis=0)
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    def _ring(self, ci: int, cj: int, r: int):
+        if r == 0:
+            yield ci, cj
+            return
+        for dj in range(-r, r + 1):
+            yield ci - r, cj + dj
+            yield ci + r, cj + dj
+        for di in range(-r + 1, r):
+            yield ci + di, cj - r
+            yield ci + di, cj + r
+
+    def _ring_bound_km(self, lat: float, r: int) -> float:
+        # After scanning rings 0..r, any other point is at least r cells away
+        # in latitude or longitude; 0.99 absorbs the gap between a parallel
+        # arc and the great circle.
+        if r == 0:
+            return 0.0
+        span = r * self.cell_deg
+        return 0.99 * span * KM_PER_DEGREE * math.cos(math.radians(min(89.9, abs(lat) + span)))
+
+    def _haversine_term(self, lat: float, lon: float, idx: np.ndarray) -> np.ndarray:
+        """The `a` of the haversine formula; distance grows monotonically with it."""
+        phi, lam = math.radians(lat), math.radians(lon)
+        return (np.sin((self._phi[idx] - phi) / 2) ** 2
+                + math.cos(phi) * self._cos_phi[idx] * np.sin((self._lam[idx] - lam) / 2) ** 2)
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Indices and distances (km) of the k nearest points, closest first."""
+        k = min(k, len(self))
+        if k == 0:
+            return np.empty(0, dtype=int), np.empty(0)
+        if len(self) <= BRUTE_FORCE_MAX_POINTS:
+            return self._finish(np.arange(len(self)), self._haversine_term(lat, lon, slice(None)), k)
+        ci, cj = math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+        # Ring at which every bucket has been scanned.
+        last_ring = int(max(ci - self._key_min[0], self._key_max[0] - ci, cj - self._key_min[1], self._key_max[1] - cj))
+        candidates = np.empty(0, dtype=int)
+        terms = np.empty(0)
+        for r in range(last_ring + 1):
+            members = [self._buckets[key] for key in self._ring(ci, cj, r) if key in self._buckets]
+            if members:
+                new = members[0] if len(members) == 1 else np.concatenate(members)
+                candidates = np.concatenate([candidates, new])
+                terms = np.concatenate([terms, self._haversine_term(lat, lon, new)])
+            if len(candidates) < k:
+                continue
+            kth = np.partition(terms, k - 1)[k - 1]
+            bound = math.sin(self._ring_bound_km(lat, r) / (2 * EARTH_RADIUS_KM)) ** 2
+            if kth <= bound or r == last_ring:
+                return self._finish(candidates, terms, k)
+        return np.empty(0, dtype=int), np.empty(0)
+
+    @staticmethod
+    def _finish(candidates: np.ndarray, terms: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        order = np.argsort(terms)[:k]
+        return candidates[order], 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(terms[order], 1.0)))
+
+def place_row(gazetteer: Gazetteer, state: str, *names: str) -> Optional[Dict[str, Any]]:
+    """
+    Coordinates for a data row: the first of `names` the gazetteer knows in
+    `state`, else the state centroid. `placed_at` records which was used.
+    """
+    for level, name in names:
+        place = gazetteer.find(f"{name}, {state}")
+        if place and place["kind"] != "state" and place["state"].lower() == state.lower():
+            return {"lat": place["lat"], "lon": place["lon"], "placed_at": level}
+    place = gazetteer.find(state)
+    if place:
+        return {"lat": place["lat"], "lon": place["lon"], "placed_at": "state"}
+    return None
+
+class LocationIndex:
+    """
+    Resolves a map click to the nearest district headquarters, the nearest
+    weather record site and the k nearest markets, without reverse geocoding.
+
+    District HQs come from the gazetteer. Weather sites and markets come
+    from the data files and are placed by name through the gazetteer; rows
+    whose names are unknown there (the bundled files use placeholder
+    district and market names) sit at their state's centroid.
+    """
+
+    def __init__(self, gazetteer: Gazetteer, weather_df: pd.DataFrame, market_df: pd.DataFrame,
+                 cell_deg: float = settings.SPATIAL_CELL_DEGREES):
+        self.weather_df = weather_df
+        self.market_df = market_df
+        self.districts = [p for p in gazetteer.places if p["kind"] == "district"]
+        self.sites = self._place(gazetteer, weather_df, ["state", "district"])
+        self.markets = self._place(gazetteer, market_df, ["state", "district", "market"])
+        self._district_index = GridIndex([p["lat"] for p in self.districts], [p["lon"] for p in self.districts], cell_deg)
+        self._site_index = GridIndex([p["lat"] for p in self.sites], [p["lon"] for p in self.sites], cell_deg)
+        self._market_index = GridIndex([p["lat"] for p in self.markets], [p["lon"] for p in self.markets], cell_deg)
+
+    @staticmethod
+    def _place(gazetteer: Gazetteer, df: pd.DataFrame, keys: List[str]) -> List[Dict[str, Any]]:
+        placed = []
+        if df.empty or not set(keys) <= set(df.columns):
+            return placed
+        for row in df[keys].drop_duplicates().itertuples(index=False):
+            record = dict(zip(keys, row))
+            names = [(key, record[key]) for key in reversed(keys[1:])]
+            location = place_row(gazetteer, record["state"], *names)
+            if location is None:
+                logger.warning(f"Cannot place {record}; skipping")
+                continue
+            placed.append({**record, **location})
+        return placed
+
+    @staticmethod
+    def _with_distance(place: Dict[str, Any], distance: float) -> Dict[str, Any]:
+        return {**place, "distance_km": round(float(distance), 1)}
+
+    def resolve(self, lat: float, lon: float, k_markets: int = 3) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"district": None, "weather_site": None, "markets": []}
+        idx, dist = self._district_index.nearest(lat, lon, 1)
+        if len(idx):
+            result["district"] = self._with_distance(self.districts[idx[0]], dist[0])
+        idx, dist = self._site_index.nearest(lat, lon, 1)
+        if len(idx):
+            result["weather_site"] = self._with_distance(self.sites[idx[0]], dist[0])
+        idx, dist = self._market_index.nearest(lat, lon, k_markets)
+        result["markets"] = [self._with_distance(self.markets[i], d) for i, d in zip(idx, dist)]
+        return result
+
+    def weather_history(self, site: Dict[str, Any]) -> pd.DataFrame:
+        df = self.weather_df
+        return df[(df["state"] == site["state"]) & (df["district"] == site["district"])]
+
+    def market_prices(self, market: Dict[str, Any]) -> pd.DataFrame:
+        df = self.market_df
+        return df[(df["state"] == market["state"]) & (df["district"] == market["district"])
+                  & (df["market"] == market["market"])]
+
+_location_index: Optional[LocationIndex] = None
+_location_lock = threading.Lock()
+
+def _read_csv(path: str) -> pd.DataFrame:
+    try:
+        return pd.read_csv(path)
+    except Exception as e:
+        logger.warning(f"Could not read {path}: {e}")
+        return pd.DataFrame()
+
+def get_location_index() -> Optional[LocationIndex]:
+    """Process-wide index over the gazetteer, weather_data.csv and mandi_prices.csv."""
+    global _location_index
+    if _location_index is None:
+        with _location_lock:
+            if _location_index is None:
+                gazetteer = get_gazetteer()
+                if gazetteer is None:
+                    return None
+                _location_index = LocationIndex(gazetteer, _read_csv("data/weather_data.csv"),
+                                                _read_csv("data/mandi_prices.csv"))
+                logger.info(f"Location index: {len(_location_index.districts)} districts, "
+                            f"{len(_location_index.sites)} weather sites, {len(_location_index.markets)} markets")
+    return _location_index
@@ -0,0 +1,234 @@
+import io
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from modules.core.config import settings
+from modules.core.logger import get_logger
+from modules.model_engines import engine_of
+from modules.model_registry import ModelRegistry, load_legacy_labels
+from modules.training.pipeline import FEATURES
+
+logger = get_logger("Incremental_Training")
+
+STORE_COLUMNS = FEATURES + ["label", "recorded_at"]
+
+def known_labels(base_data: Sequence[str]) -> List[str]:
+    """Label order used by the LabelEncoder in the full pipeline."""
+    labels = set()
+    for path in base_data:
+        labels.update(pd.read_csv(path, usecols=["label"])["label"].astype(str).str.lower())
+    return sorted(labels)
+
+def append_field_samples(new_rows: pd.DataFrame, labels: List[str],
+                         store_path: str = settings.FIELD_SAMPLES_PATH) -> int:
+    """
+    Validates newly labelled rows and appends them to the training store.
+    Rows with an unknown crop label are rejected: adding a class needs a full
+    retrain (Modelcode.py), not a warm start.
+    """
+    missing = set(FEATURES + ["label"]) - set(new_rows.columns)
+    if missing:
+        raise ValueError(f"Field samples are missing columns: {sorted(missing)}")
+
+    rows = new_rows[FEATURES + ["label"]].dropna().copy()
+    rows["label"] = rows["label"].astype(str).str.lower().str.strip()
+    unknown = sorted(set(rows["label"]) - set(labels))
+    if unknown:
+        logger.warning(f"Dropping rows with labels the model does not know: {unknown}")
+        rows = rows[rows["label"].isin(labels)]
+
+    rows["recorded_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    store = Path(store_path)
+    store.parent.mkdir(parents=True, exist_ok=True)
+    rows[STORE_COLUMNS].to_csv(store, mode="a", header=not store.exists(), index=False)
+    logger.info(f"Appended {len(rows)} field samples to {store_path}")
+    return len(rows)
+
+def read_fresh_samples(store_path: str, offset: Optional[int], absorbed: int) -> Tuple[pd.DataFrame, int, int]:
+    """
+    Store rows after byte `offset` (the end of the last absorbed row), with
+    the byte range they span. Only complete lines present when the read
+    starts are taken, so a concurrent append is picked up by the next run.
+    Versions recorded before offsets existed are located by counting lines.
+    """
+    path = Path(store_path)
+    if not path.exists():
+        return pd.DataFrame(columns=STORE_COLUMNS), 0, 0
+    with open(path, "rb") as f:
+        header = f.readline()
+        if offset is None:
+            for _ in range(absorbed):
+                f.readline()
+            offset = f.tell()
+        start = max(offset, len(header))
+        f.seek(start)
+        data = f.read(path.stat().st_size - start)
+    data = data[:data.rfind(b"\n") + 1]
+    fresh = pd.read_csv(io.BytesIO(header + data)) if data else pd.DataFrame(columns=STORE_COLUMNS)
+    return fresh, start, start + len(data)
+
+class ReplayReservoir:
+    """
+    Per-crop uniform sample (reservoir sampling) of every row the forest has
+    been fitted on. It is stored in each version's metadata, so it follows
+    rollbacks, and updating it only touches the new rows; the full history is
+    read once, when a version without a reservoir is first grown.
+    """
+
+    def __init__(self, per_class: int, rows: Dict[str, List[List[float]]], seen: Dict[str, int]):
+        self.per_class = per_class
+        self.rows = rows
+        self.seen = seen
+
+    @classmethod
+    def from_metadata(cls, state: Dict[str, Any], per_class: int) -> "ReplayReservoir":
+        return cls(per_class, {label: [list(r) for r in rows] for label, rows in state["rows"].items()},
+                   dict(state["seen"]))
+
+    @classmethod
+    def from_history(cls, base_data: Sequence[str], store_path: str, offset: int,
+                     per_class: int, random_state: int) -> "ReplayReservoir":
+        frames = [pd.read_csv(p)[FEATURES + ["label"]] for p in base_data]
+        # `offset` ends the absorbed store rows; the header comes with them.
+        if offset and Path(store_path).exists():
+            with open(store_path, "rb") as f:
+                frames.append(pd.read_csv(io.BytesIO(f.read(offset)))[FEATURES + ["label"]])
+        reservoir = cls(per_class, {}, {})
+        reservoir.add(pd.concat(frames, ignore_index=True), random_state)
+        return reservoir
+
+    def add(self, rows: pd.DataFrame, random_state: int):
+        """Algorithm R per crop: the k kept rows stay a uniform sample of all rows seen."""
+        rng = np.random.default_rng(random_state)
+        labels = rows["label"].astype(str).str.lower().to_numpy()
+        values = rows[FEATURES].to_numpy(dtype=float).tolist()
+        for label, row in zip(labels, values):
+            kept = self.rows.setdefault(label, [])
+            self.seen[label] = self.seen.get(label, 0) + 1
+            if len(kept) < self.per_class:
+                kept.append(row)
+            else:
+                slot = int(rng.integers(self.seen[label]))
+                if slot < self.per_class:
+                    kept[slot] = row
+
+    def sample(self) -> pd.DataFrame:
+        records = [row + [label] for label, rows in self.rows.items() for row in rows[:self.per_class]]
+        return pd.DataFrame(records, columns=FEATURES + ["label"])
+
+    def to_metadata(self) -> Dict[str, Any]:
+        return {"per_class": self.per_class, "seen": self.seen, "rows": self.rows}
+
+def grow_forest(model: Any, X_scaled: np.ndarray, y: np.ndarray, n_new_trees: int,
+                max_trees: Optional[int] = None) -> Any:
+    """
+    Adds `n_new_trees` trees fitted on (X_scaled, y), then retires the oldest
+    trees beyond `max_trees`, so model size and per-row latency stay flat
+    however many runs are absorbed. The other trees are untouched.
+    """
+    if engine_of(model) != "random_forest":
+        raise ValueError(f"Incremental training only supports random_forest, not {engine_of(model)}; "
+                         f"run Modelcode.py for a full refit")
+    previous = len(model.estimators_)
+    model.set_params(warm_start=True, n_estimators=previous + n_new_trees)
+    model.fit(X_scaled, y)
+    model.set_params(warm_start=False)
+    if max_trees is not None and len(model.estimators_) > max_trees:
+        model.estimators_ = model.estimators_[-max_trees:]
+        model.set_params(n_estimators=max_trees)
+    logger.info(f"Forest grown from {previous} to {len(model.estimators_)} trees on {len(y)} rows"
+                f"{f' (capped at {max_trees})' if max_trees is not None else ''}")
+    return model
+
+def parent_artifacts(registry: ModelRegistry) -> Dict[str, Any]:
+    """
+    The version being served (unpickled sklearn model), so a rollback is
+    not undone by the next run; the newest version when none is active,
+    then the legacy model files.
+    """
+    versions = registry.versions()
+    version = registry.active_version()
+    if version not in versions:
+        if version:
+            logger.warning(f"Active model version {version} is missing from {registry.root}")
+        version = versions[-1] if versions else None
+    if version:
+        path = registry.root / version
+        model_path, scaler_path = path / "model.pkl", path / "scaler.pkl"
+        metadata = json.loads((path / "metadata.json").read_text())
+        labels = json.loads((path / "labels.json").read_text())
+    else:
+        model_path, scaler_path = Path(settings.MODEL_PATH), Path(settings.SCALER_PATH)
+        with open(settings.MODEL_METADATA_PATH, "r") as f:
+            metadata = json.load(f)
+        labels, version = load_legacy_labels(), "legacy"
+    return {"version": version, "model": joblib.load(model_path), "scaler": joblib.load(scaler_path),
+            "metadata": metadata, "labels": labels}
+
+def run_incremental(n_new_trees: int = 50, replay_per_class: int = 10, random_state: int = 42,
+                    base_data: Sequence[str] = ("data/crop_recommendation.csv",),
+                    store_path: str = settings.FIELD_SAMPLES_PATH,
+                    registry: Optional[ModelRegistry] = None, activate: bool = False,
+                    max_trees: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Grows the active forest in the registry with trees trained on field
+    samples it has not absorbed yet, and publishes the result as a new
+    registry version. The forest is kept at `max_trees` (default: the cap
+    recorded by the parent, else the parent's size) by retiring its oldest
+    trees. It only goes live with `activate` (or a later
+    `ModelRegistry.activate`).
+    """
+    registry = registry or ModelRegistry()
+    parent = parent_artifacts(registry)
+    metadata = parent["metadata"]
+    previous = metadata.get("incremental", {})
+    absorbed = int(previous.get("field_rows_absorbed", 0))
+
+    fresh, start, offset = read_fresh_samples(store_path, previous.get("field_bytes_absorbed"), absorbed)
+    if fresh.empty:
+        logger.info("No new field samples since the last incremental run")
+        return {"status": "no_data", "absorbed": absorbed}
+
+    model, scaler, labels = parent["model"], parent["scaler"], parent["labels"]
+    max_trees = max_trees or previous.get("max_trees") or len(model.estimators_)
+
+    if "replay" in previous:
+        reservoir = ReplayReservoir.from_metadata(previous["replay"], replay_per_class)
+    else:
+        reservoir = ReplayReservoir.from_history(base_data, store_path, start if absorbed else 0,
+                                                 replay_per_class, random_state)
+    replay = reservoir.sample()
+    fit_rows = pd.concat([fresh[FEATURES + ["label"]], replay], ignore_index=True)
+    fit_rows["label"] = fit_rows["label"].astype(str).str.lower()
+    class_ids = {name: i for i, name in enumerate(labels)}
+    fit_rows = fit_rows[fit_rows["label"].isin(class_ids)]
+    X_scaled = scaler.transform(fit_rows[FEATURES].to_numpy(dtype=float))
+    y = fit_rows["label"].map(class_ids).to_numpy(dtype=int)
+
+    start = time.perf_counter()
+    model = grow_forest(model, X_scaled, y, n_new_trees, max_trees)
+    train_s = time.perf_counter() - start
+    reservoir.add(fresh, random_state + absorbed)
+
+    metadata.setdefault("model_details", {})["last_trained"] = datetime.now().strftime("%Y-%m-%d")
+    metadata["incremental"] = {
+        "parent": parent["version"],
+        "field_rows_absorbed": absorbed + len(fresh),
+        "field_bytes_absorbed": offset,
+        "new_rows": len(fresh),
+        "replay_rows": len(replay),
+        "trees": len(model.estimators_),
+        "max_trees": max_trees,
+        "train_seconds": round(train_s, 2),
+        "replay": reservoir.to_metadata(),
+    }
+    version = registry.publish(model, scaler, labels, metadata, activate=activate)
+    summary = {k: v for k, v in metadata["incremental"].items() if k != "replay"}
+    return {"status": "success", "version": version, "activated": activate, **summary}
@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, f1_score, precision_score, recall_score
+from sklearn.model_selection import HalvingRandomSearchCV, RandomizedSearchCV, train_test_split
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from modules.core.config import settings
+from modules.core.logger import get_logger
+from modules.model_engines import ENGINES, export_serving_model, get_engine
+from modules.model_registry import ModelRegistry, write_labels
+
+logger = get_logger("Training_Pipeline")
+
+FEATURES = ["N", "P", "K", "temperature", "humidity", "ph", "rainfall"]
+STAGES = ("load", "prepare", "search", "evaluate", "export")
+# Bump when a stage's code changes shape so stale cached outputs are not reused.
+PIPELINE_VERSION = 1
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def stage_key(name: str, params: Dict[str, Any], upstream: Sequence[str] = ()) -> str:
+    payload = json.dumps({"stage": name, "version": PIPELINE_VERSION, "params": params, "upstream": list(upstream)},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+class StageCache:
+    """Stores each stage's output under its content key so unchanged stages are skipped."""
+
+    def __init__(self, cache_dir: str = settings.PIPELINE_CACHE_DIR, force: bool = False):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.force = force
+
+    def path(self, name: str, key: str) -> Path:
+        return self.cache_dir / f"{name}-{key}.joblib"
+
+    def run(self, name: str, key: str, fn: Callable[[], Any]) -> Any:
+        path = self.path(name, key)
+        if path.exists() and not self.force:
+            logger.info(f"[{name}] cached ({key}), skipping")
+            return joblib.load(path)
+
+        logger.info(f"[{name}] running ({key})")
+        start = time.perf_counter()
+        result = fn()
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        joblib.dump(result, tmp_path)
+        os.replace(tmp_path, path)
+        logger.info(f"[{name}] done in {time.perf_counter() - start:.1f}s")
+        return result
+
+def load_stage(data_paths: Sequence[str]) -> pd.DataFrame:
+    frames = [pd.read_csv(p) for p in data_paths]
+    df = pd.concat(frames, ignore_index=True)
+    missing = set(FEATURES + ["label"]) - set(df.columns)
+    if missing:
+        raise ValueError(f"Training data is missing columns: {sorted(missing)}")
+    logger.info(f"Loaded {len(df)} rows from {len(data_paths)} file(s)")
+    return df
+
+def prepare_stage(df: pd.DataFrame, test_size: float, random_state: int) -> Dict[str, Any]:
+    X = df[FEATURES].copy()
+    X = X.fillna(X.median())
+    y = df["label"].astype(str).str.lower()
+
+    encoder = LabelEncoder()
+    y_enc = encoder.fit_transform(y)
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_scaled, y_enc, test_size=test_size, random_state=random_state, stratify=y_enc)
+
+    return {
+        "X_train": X_train, "X_test": X_test, "y_train": y_train, "y_test": y_test,
+        "scaler": scaler, "labels": list(encoder.classes_),
+        "median_input": X.median().to_dict(),
+    }
+
+def search_stage(prep: Dict[str, Any], engine: str, strategy: str, n_iter: int, cv: int, random_state: int,
+                 param_dist: Optional[Dict[str, List[Any]]] = None) -> Dict[str, Any]:
+    spec = get_engine(engine)
+    base = spec.build(random_state)
+    param_dist = param_dist or spec.param_dist
+
+    if strategy == "halving":
+        # Successive halving: many candidates on small subsamples, only the
+        # survivors of each round are refit on a larger share of the data.
+        n_classes = len(prep["labels"])
+        search = HalvingRandomSearchCV(
+            base, param_distributions=param_dist, n_candidates=n_iter, factor=3,
+            resource="n_samples", min_resources=min(len(prep["y_train"]), n_classes * cv),
+            scoring="accuracy", cv=cv, random_state=random_state, n_jobs=-1)
+    elif strategy == "random":
+        search = RandomizedSearchCV(
+            base, param_distributions=param_dist, n_iter=n_iter,
+            scoring="accuracy", cv=cv, random_state=random_state, n_jobs=-1)
+    else:
+        raise ValueError(f"Unknown search strategy: {strategy}")
+
+    search.fit(prep["X_train"], prep["y_train"])
+    n_train = len(prep["y_train"])
+    if strategy == "halving":
+        rounds = list(zip(search.n_candidates_, search.n_resources_))
+    else:
+        rounds = [(n_iter, n_train)]
+    n_fits = sum(c for c, _ in rounds) * cv
+    # Cost in training rows fitted, relative to fitting every candidate on the full split.
+    fit_cost = sum(c * r for c, r in rounds) / (sum(c for c, _ in rounds[:1]) * n_train)
+    logger.info(f"{engine} {strategy} search: {n_fits} fits ({fit_cost:.0%} of a full random search's sample cost), "
+                f"best CV accuracy {search.best_score_:.4f}")
+    return {
+        "model": search.best_estimator_,
+        "best_params": search.best_params_,
+        "cv_score": float(search.best_score_),
+        "n_fits": n_fits,
+        "fit_cost": round(fit_cost, 3),
+        "strategy": strategy,
+        "engine": engine,
+    }
+
+def evaluate_stage(model: Any, prep: Dict[str, Any]) -> Dict[str, Any]:
+    y_test = prep["y_test"]
+    y_pred = model.predict(prep["X_test"])
+    present = np.unique(np.concatenate([y_test, y_pred]))
+    return {
+        "accuracy": float(accuracy_score(y_test, y_pred)),
+        "f1_score": float(f1_score(y_test, y_pred, average="macro", zero_division=0)),
+        "precision": float(precision_score(y_test, y_pred, average="macro", zero_division=0)),
+        "recall": float(recall_score(y_test, y_pred, average="macro", zero_division=0)),
+        "report": classification_report(y_test, y_pred, labels=present,
+                                        target_names=[prep["labels"][i] for i in present], zero_division=0),
+        "confusion_matrix": confusion_matrix(y_test, y_pred),
+    }
+
+def plot_confusion_matrix(matrix: np.ndarray, labels: List[str], path: str):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+    except ImportError:
+        logger.warning("matplotlib/seaborn not installed, skipping confusion matrix plot")
+        return
+    plt.figure(figsize=(10, 8))
+    sns.heatmap(matrix, annot=True, fmt="d", cmap="Blues", xticklabels=labels, yticklabels=labels)
+    plt.title("Confusion Matrix")
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+def export_stage(key: str, search: Dict[str, Any], prep: Dict[str, Any], metrics: Dict[str, Any],
+                 model_path: str, scaler_path: str, forest_path: str, metadata_path: str, labels_path: str,
+                 force: bool = False, registry: Optional[ModelRegistry] = None, activate: bool = False) -> bool:
+    """
+    Writes the serving artifacts and publishes them as a new registry version;
+    skipped when they were already produced from the same key.
+    """
+    stamp_path = Path(model_path).with_suffix(".stamp")
+    outputs = [Path(model_path), Path(scaler_path), Path(forest_path), Path(metadata_path), Path(labels_path)]
+    if not force and stamp_path.exists() and stamp_path.read_text().strip() == key and all(p.exists() for p in outputs):
+        logger.info(f"[export] artifacts already built from {key}, skipping")
+        return False
+
+    Path(model_path).parent.mkdir(parents=True, exist_ok=True)
+    export_serving_model(search["model"], prep["scaler"], model_path, scaler_path, forest_path)
+    # Class id -> crop name of this model, read back by load_legacy_bundle.
+    write_labels(prep["labels"], labels_path)
+
+    metadata = {}
+    if Path(metadata_path).exists():
+        with open(metadata_path, "r") as f:
+            metadata = json.load(f)
+    details = metadata.setdefault("model_details", {})
+    details["last_trained"] = datetime.now().strftime("%Y-%m-%d")
+    details["algorithm"] = f"{ENGINES[search['engine']].label} Classifier"
+    details["engine"] = search["engine"]
+    metadata["training_metrics"] = {k: round(metrics[k], 3) for k in ("accuracy", "f1_score", "precision", "recall")}
+    metadata.setdefault("features_schema", {})["target_labels"] = len(prep["labels"])
+    metadata.setdefault("data_info", {})["training_samples"] = int(len(prep["y_train"]) + len(prep["y_test"]))
+    metadata["search"] = {k: search[k] for k in ("engine", "strategy", "best_params", "cv_score", "n_fits", "fit_cost")}
+    metadata["pipeline_key"] = key
+    with open(metadata_path, "w") as f:
+        json.dump(metadata, f, indent=4, default=str)
+
+    if registry is not None:
+        registry.publish(search["model"], prep["scaler"], prep["labels"], metadata, activate=activate)
+
+    stamp_path.write_text(key)
+    logger.info(f"[export] wrote {model_path}, {scaler_path}, {forest_path}, {metadata_path}")
+    return True
+
+def run_pipeline(data_paths: Sequence[str], engine: str = "random_forest", strategy: str = "halving", n_iter: int = 30, cv: int = 4,
+                 test_size: float = 0.2, random_state: int = 42, stop_after: str = "export",
+                 force: bool = False, plot: bool = False, activate: bool = False,
+                 model_path: str = settings.MODEL_PATH, scaler_path: str = settings.SCALER_PATH,
+                 forest_path: str = settings.FOREST_PATH,
+                 metadata_path: str = settings.MODEL_METADATA_PATH,
+                 labels_path: str = settings.LABELS_PATH) -> Dict[str, Any]:
+    """Runs load -> prepare -> search -> evaluate -> export, reusing cached stage outputs."""
+    if stop_after not in STAGES:
+        raise ValueError(f"Unknown stage: {stop_after}")
+    last = STAGES.index(stop_after)
+    cache = StageCache(force=force)
+    results: Dict[str, Any] = {}
+
+    load_key = stage_key("load", {"files": {p: file_digest(p) for p in data_paths}})
+    df = cache.run("load", load_key, lambda: load_stage(data_paths))
+    results["load"] = {"key": load_key, "rows": len(df)}
+    if last == 0:
+        return results
+
+    prep_key = stage_key("prepare", {"test_size": test_size, "random_state": random_state}, [load_key])
+    prep = cache.run("prepare", prep_key, lambda: prepare_stage(df, test_size, random_state))
+    results["prepare"] = {"key": prep_key, "train": len(prep["y_train"]), "test": len(prep["y_test"])}
+    if last == 1:
+        return results
+
+    search_params = {"engine": engine, "strategy": strategy, "n_iter": n_iter, "cv": cv,
+                     "random_state": random_state, "param_dist": get_engine(engine).param_dist}
+    search_key = stage_key("search", search_params, [prep_key])
+    search = cache.run("search", search_key, lambda: search_stage(prep, engine, strategy, n_iter, cv, random_state))
+    results["search"] = {"key": search_key, **{k: search[k] for k in ("best_params", "cv_score", "n_fits", "fit_cost")}}
+    if last == 2:
+        return results
+
+    eval_key = stage_key("evaluate", {}, [search_key])
+    metrics = cache.run("evaluate", eval_key, lambda: evaluate_stage(search["model"], prep))
+    results["evaluate"] = {"key": eval_key, **{k: metrics[k] for k in ("accuracy", "f1_score", "precision", "recall")}}
+    if plot:
+        plot_confusion_matrix(metrics["confusion_matrix"], prep["labels"],
+                              str(Path(model_path).parent / "confusion_matrix.png"))
+    if last == 3:
+        return results
+
+    exported = export_stage(eval_key, search, prep, metrics, model_path, scaler_path,
+                            forest_path, metadata_path, labels_path, force=force, registry=ModelRegistry(),
+                            activate=activate)
+    results["export"] = {"key": eval_key, "written": exported}
+    results["report"] = metrics["report"]
+    results["_artifacts"] = {"model": search["model"], "scaler": prep["scaler"], "labels": prep["labels"],
+                             "median_input": prep["median_input"]}
+    return results
@@ -1,13 +1,14 @@
 import pandas as pd
-import requests
 import joblib
 import numpy as np
 from datetime import datetime, date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from geopy.geocoders import Nominatim
 from geopy.extra.rate_limiter import RateLimiter
-from functools import lru_cache
 from modules.core.logger import get_logger
 from modules.core.schemas import WeatherData
+from modules.geocoding import get_gazetteer, get_geocode_cache
+from modules.weather_client import ForecastCache, coordinate_key, get_weather_client
 
 logger = get_logger("Weather_Advisor")
 
@@ -21,16 +22,141 @@ except Exception as e:
 geolocator = Nominatim(user_agent="cropvanta_ai", timeout=10)
 geocode = RateLimiter(geolocator.geocode, min_delay_seconds=1)
 
-@lru_cache(maxsize=50)
 def geocode_location(location_name: str):
+    """
+    Offline gazetteer first, then the shared on-disk cache; only unknown
+    places go through the rate-limited Nominatim call.
+    """
+    gazetteer = get_gazetteer()
+    coords = gazetteer.lookup(location_name) if gazetteer else None
+    if coords:
+        return coords
+
+    cache = get_geocode_cache()
+    if cache:
+        found, coords = cache.get(location_name)
+        if found:
+            return coords
+
     try:
         location = geocode(location_name)
-        if location:
-            return round(location.latitude, 4), round(location.longitude, 4)
-        logger.warning(f"No coordinates found for {location_name}")
+        coords = (round(location.latitude, 4), round(location.longitude, 4)) if location else None
+        if coords is None:
+            logger.warning(f"No coordinates found for {location_name}")
     except Exception as e:
+        # Transient failures are not cached; the next request retries.
         logger.warning(f"Geocoding failed for {location_name}: {e}")
-    return None
+        return None
+    if cache:
+        cache.put(location_name, coords)
+    return coords
+
+FORECAST_DAILY_FIELDS = "temperature_2m_max,temperature_2m_min,precipitation_sum,relative_humidity_2m_mean"
+
+forecast_cache = ForecastCache()
+
+def blend_forecast(daily: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turns an Open-Meteo `daily` block into arrays and blends rf_temp into the
+    max temperature for all days in one predict call.
+    """
+    max_temp = np.array(daily["temperature_2m_max"], dtype=float)
+    min_temp = np.array(daily["temperature_2m_min"], dtype=float)
+    n_days = len(max_temp)
+    precip = np.array(daily.get("precipitation_sum") or [0] * n_days, dtype=float)
+    humidity = np.array(daily.get("relative_humidity_2m_mean") or [60] * n_days, dtype=float)
+
+    final_temp = max_temp.copy()
+    blended = np.zeros(n_days, dtype=bool)
+    if rf_temp is not None:
+        features = np.column_stack([min_temp, precip, humidity])
+        usable = np.isfinite(features).all(axis=1) & np.isfinite(max_temp)
+        if usable.any():
+            try:
+                ml_pred = rf_temp.predict(features[usable])
+                final_temp[usable] = (max_temp[usable] + ml_pred) / 2  # Blend for improvement
+                blended = usable
+                logger.info(f"ML model blended into {int(usable.sum())} forecast days")
+            except Exception as ml_e:
+                logger.warning(f"ML prediction failed: {ml_e}")
+
+    return {
+        "time": list(daily["time"]),
+        "max_temp": max_temp,
+        "min_temp": min_temp,
+        "precipitation": precip,
+        "humidity": humidity,
+        "final_temp": final_temp,
+        "blended": blended,
+    }
+
+def fetch_forecasts(coords: Sequence[Tuple[float, float]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Whole 7-day blended forecasts for many coordinates. Fresh ones come from
+    the cache; the rest go out as Open-Meteo multi-location batches.
+    """
+    today = date.today().strftime("%Y-%m-%d")
+    keys = [coordinate_key(lat, lon) for lat, lon in coords]
+    forecasts: Dict[Tuple[float, float], Optional[Dict[str, Any]]] = {}
+    missing = []
+    for key in dict.fromkeys(keys):
+        forecast = forecast_cache.get(key)
+        if forecast is not None and today in forecast["time"]:
+            forecasts[key] = forecast
+        else:
+            missing.append(key)
+
+    if missing:
+        payloads = get_weather_client().fetch_many(missing, daily=FORECAST_DAILY_FIELDS,
+                                                   timezone="Asia/Kolkata", forecast_days=7)
+        for key, payload in zip(missing, payloads):
+            forecast = None
+            if payload is not None:
+                try:
+                    forecast = blend_forecast(payload.get("daily", {}))
+                    forecast_cache.put(key, forecast)
+                except (KeyError, ValueError, TypeError) as e:
+                    logger.error(f"Data parsing error for {key}: {e}")
+            forecasts[key] = forecast
+    return [forecasts[key] for key in keys]
+
+def fetch_forecast(lat: float, lon: float) -> Optional[Dict[str, Any]]:
+    """Whole 7-day blended forecast for a coordinate, from the cache when fresh."""
+    return fetch_forecasts([(lat, lon)])[0]
+
+def forecast_day(forecast: Dict[str, Any], location_name: str, target_date: datetime) -> Optional[Dict[str, Any]]:
+    """One day of a cached forecast in the get_live_weather response shape."""
+    date_str = target_date.strftime("%Y-%m-%d")
+    time_list = forecast["time"]
+    if date_str not in time_list:
+        logger.error(f"Date {date_str} not in forecast range {time_list[:3]}...")
+        return None
+
+    idx = time_list.index(date_str)
+    source = "Live API (Open-Meteo)"
+    confidence = 0.95
+    if forecast["blended"][idx]:
+        source += " + ML Model"
+        confidence = 0.98
+
+    humidity = float(forecast["humidity"][idx])
+    precip = float(forecast["precipitation"][idx])
+    validated_data = WeatherData(
+        city=location_name,
+        temp=float(forecast["final_temp"][idx]),
+        description="Forecast" if idx > 0 else "Current conditions",
+        humidity=int(round(humidity))
+    )
+
+    return {
+        "location": validated_data.city.title(),
+        "max_temp": round(validated_data.temp, 1),
+        "min_temp": round(float(forecast["min_temp"][idx]), 1),
+        "precipitation": precip if np.isfinite(precip) else None,
+        "humidity": humidity,
+        "source": source,
+        "confidence": confidence
+    }
 
 def get_live_weather(location_name: str, target_date: datetime = None):
     if target_date is None:
@@ -41,63 +167,11 @@ def get_live_weather(location_name: str, target_date: datetime = None):
         logger.error(f"Failed to geocode {location_name}")
         return None
 
-    lat, lon = coords
-    api_url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&daily=temperature_2m_max,temperature_2m_min,precipitation_sum,relative_humidity_2m_mean&timezone=Asia/Kolkata&forecast_days=7"
-
     try:
-        response = requests.get(api_url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        daily = data.get("daily", {})
-        time_list = daily.get("time", [])
-
-        date_str = target_date.strftime("%Y-%m-%d")
-        if date_str not in time_list:
-            logger.error(f"Date {date_str} not in forecast range {time_list[:3]}...")
+        forecast = fetch_forecast(*coords)
+        if forecast is None:
             return None
-
-        idx = time_list.index(date_str)
-
-        # Extract real data [web:1][web:2]
-        max_temp = daily["temperature_2m_max"][idx]
-        min_temp = daily["temperature_2m_min"][idx]
-        precip = daily.get("precipitation_sum", [0])[idx]
-        humidity = daily.get("relative_humidity_2m_mean", [60])[idx]
-
-        final_temp = max_temp
-        confidence = 0.95
-        source = "Live API (Open-Meteo)"
-        if rf_temp is not None:
-            try:
-                features = np.array([[min_temp, precip, humidity]]).reshape(1, -1)
-                ml_pred = rf_temp.predict(features)[0]
-                final_temp = (max_temp + ml_pred) / 2  # Blend for improvement
-                confidence = 0.98
-                source += " + ML Model"
-                logger.info("ML model prediction blended successfully")
-            except Exception as ml_e:
-                logger.warning(f"ML prediction failed: {ml_e}")
-
-        validated_data = WeatherData(
-            city=location_name,
-            temp=final_temp,
-            description="Forecast" if idx > 0 else "Current conditions",
-            humidity=humidity
-        )
-
-        return {
-            "location": validated_data.city.title(),
-            "max_temp": round(validated_data.temp, 1),
-            "min_temp": round(min_temp, 1),
-            "precipitation": precip,
-            "humidity": humidity,
-            "source": source,
-            "confidence": confidence
-        }
-    except requests.exceptions.RequestException as e:
-        logger.error(f"API request failed: {e}")
-    except (KeyError, ValueError, IndexError) as e:
-        logger.error(f"Data parsing error: {e} - Keys: {daily.keys() if 'daily' in locals() else 'no daily'}")
+        return forecast_day(forecast, location_name, target_date)
     except Exception as e:
         logger.error(f"Weather fetch error: {e}")
-    return None
\ No newline at end of file
+    return None
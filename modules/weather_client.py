@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import requests
+
+from modules.core.config import settings
+from modules.core.http_client import HttpClient, get_http_client
+from modules.core.logger import get_logger
+
+logger = get_logger("Weather_Client")
+
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+
+Coordinate = Tuple[float, float]
+
+def coordinate_key(lat: float, lon: float) -> Tuple[float, float]:
+    """Forecast grid key: 0.01 deg (~1 km) is finer than the provider's model grid."""
+    return round(lat, 2), round(lon, 2)
+
+class ForecastCache:
+    """
+    Thread-safe LRU of per-coordinate forecast data keyed on rounded
+    coordinates (whole 7-day forecasts, per-cell climate summaries).
+
+    Open-Meteo refreshes its forecasts about hourly, so an entry lives for
+    FORECAST_TTL_SECONDS and serves every target_date it covers.
+    """
+
+    def __init__(self, max_size: int = settings.FORECAST_CACHE_SIZE,
+                 ttl_seconds: float = settings.FORECAST_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[float, float], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[float, float]) -> Optional[Any]:
+        with self._lock:
+            return self._get(key, time.monotonic())
+
+    def get_many(self, keys: Sequence[Tuple[float, float]]) -> List[Optional[Any]]:
+        """Looks up a whole grid under one lock acquisition."""
+        with self._lock:
+            now = time.monotonic()
+            return [self._get(key, now) for key in keys]
+
+    def _get(self, key: Tuple[float, float], now: float) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < now:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Tuple[float, float], forecast: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, forecast)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+class OpenMeteoClient:
+    """
+    Bulk Open-Meteo forecasts over one pooled session.
+
+    Open-Meteo accepts comma-separated latitude/longitude lists and answers
+    with one JSON object per location, so `fetch_many` deduplicates the
+    coordinates, packs them into batches of `batch_size` and sends the
+    batches concurrently through the shared HTTP client, so they reuse its
+    connection pool and count against the "open_meteo" deadline, retry
+    budget and circuit breaker.
+    """
+
+    def __init__(self, batch_size: int = settings.WEATHER_BATCH_SIZE,
+                 workers: int = settings.WEATHER_WORKERS,
+                 http: Optional[HttpClient] = None):
+        self.batch_size = batch_size
+        self.workers = workers
+        self.http = http or get_http_client()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="open-meteo")
+
+    def _fetch_batch(self, batch: List[Coordinate], params: Dict[str, Any],
+                     deadline: Optional[float] = None) -> List[Optional[Dict[str, Any]]]:
+        query = dict(params)
+        query["latitude"] = ",".join(str(lat) for lat, _ in batch)
+        query["longitude"] = ",".join(str(lon) for _, lon in batch)
+        try:
+            response = self.http.get("open_meteo", OPEN_METEO_URL, deadline=deadline, params=query)
+            response.raise_for_status()
+            payload = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.error(f"Open-Meteo batch of {len(batch)} failed: {e}")
+            return [None] * len(batch)
+        # A single location comes back as an object, several as a list.
+        results = payload if isinstance(payload, list) else [payload]
+        if len(results) != len(batch):
+            logger.error(f"Open-Meteo returned {len(results)} locations for {len(batch)} requested")
+            return [None] * len(batch)
+        return results
+
+    def fetch_many(self, coords: Sequence[Coordinate], deadline: Optional[float] = None,
+                   **params) -> List[Optional[Dict[str, Any]]]:
+        """
+        Forecast payloads aligned with `coords` (None where a batch failed).
+        `params` are passed to the API as-is, e.g. daily="precipitation_sum";
+        `deadline` overrides the provider's per-request deadline.
+        """
+        unique = list(dict.fromkeys((float(lat), float(lon)) for lat, lon in coords))
+        batches = [unique[i:i + self.batch_size] for i in range(0, len(unique), self.batch_size)]
+        if len(batches) == 1:
+            results = [self._fetch_batch(batches[0], params, deadline)]
+        else:
+            results = list(self._executor.map(lambda batch: self._fetch_batch(batch, params, deadline), batches))
+
+        by_coord = {}
+        for batch, payloads in zip(batches, results):
+            by_coord.update(zip(batch, payloads))
+        return [by_coord[(float(lat), float(lon))] for lat, lon in coords]
+
+    def fetch(self, lat: float, lon: float, deadline: Optional[float] = None, **params) -> Optional[Dict[str, Any]]:
+        return self.fetch_many([(lat, lon)], deadline=deadline, **params)[0]
+
+_weather_client: Optional[OpenMeteoClient] = None
+_weather_client_lock = threading.Lock()
+
+def get_weather_client() -> OpenMeteoClient:
+    """Process-wide client, so every caller shares one connection pool."""
+    global _weather_client
+    if _weather_client is None:
+        with _weather_client_lock:
+            if _weather_client is None:
+                _weather_client = OpenMeteoClient()
+    return _weather_client
@@ -2,7 +2,11 @@ import streamlit as st
 import pandas as pd
 import json
 from pathlib import Path
+from modules.core.config import settings
+from modules.core.http_client import get_http_client
 from modules.core.logger import get_logger
+from modules.bulk_scoring import BulkScoringJob, count_rows
+from modules.drift_monitor import PSI_MODERATE, PSI_SIGNIFICANT, get_drift_monitor
 from modules.news_fetcher import PaperManager
 
 logger = get_logger(__name__)
@@ -56,8 +60,8 @@ def run_admin():
             msg_count = len(pd.read_csv("data/contact_queries.csv"))
         st.markdown(f"<div class='admin-card' style='border-left-color:#e74c3c;'><p class='metric-text'>New Queries</p><p class='metric-val'>{msg_count}</p></div>", unsafe_allow_html=True)
 
-    tab_feedback, tab_papers, tab_system = st.tabs([
-        "User Feedback & Queries", "Paper Management", "System Engine"
+    tab_feedback, tab_papers, tab_bulk, tab_system = st.tabs([
+        "User Feedback & Queries", "Paper Management", "Bulk Scoring", "System Engine"
     ])
 
     with tab_feedback:
@@ -90,6 +94,52 @@ def run_admin():
         else:
             st.info("Repository is empty.")
 
+    with tab_bulk:
+        st.subheader("Soil Health Card Bulk Scoring")
+        st.caption("CSV with N, P, K, temperature, humidity, ph, rainfall columns. "
+                   "An interrupted job resumes from its last checkpoint when the same file is uploaded again.")
+        upload = st.file_uploader("Upload soil sample export", type=["csv"], key="bulk_upload")
+        if upload is not None:
+            job_dir = Path(settings.BULK_JOBS_DIR)
+            job_dir.mkdir(parents=True, exist_ok=True)
+            input_path = job_dir / Path(upload.name).name
+            output_path = input_path.with_suffix(".scored.csv")
+            if not input_path.exists() or input_path.stat().st_size != upload.size:
+                with open(input_path, "wb") as f:
+                    for block in iter(lambda: upload.read(1 << 20), b""):
+                        f.write(block)
+
+            job = BulkScoringJob(str(input_path), str(output_path))
+            checkpoint = job.load_checkpoint()
+            if checkpoint and not checkpoint.get("done"):
+                st.info(f"Checkpoint found: {checkpoint['rows_done']} rows already scored.")
+            restart = st.checkbox("Start over (ignore checkpoint)", value=False)
+
+            if st.button("Run Bulk Scoring"):
+                total = count_rows(str(input_path))
+                bar = st.progress(0.0, text="Starting workers...")
+                def report(state):
+                    done = state["rows_done"]
+                    bar.progress(min(done / max(total, 1), 1.0), text=f"{done:,} / {total:,} rows scored")
+                try:
+                    result = job.run(restart=restart, progress=report)
+                    bar.progress(1.0, text=f"{result['rows_done']:,} rows scored")
+                    st.success(f"Scored {result['rows_done']:,} rows.")
+                except Exception as e:
+                    logger.error(f"Bulk scoring failed: {e}")
+                    st.error(f"Bulk scoring failed: {e}")
+
+            checkpoint = job.load_checkpoint()
+            if checkpoint and checkpoint.get("done") and output_path.exists():
+                size_mb = output_path.stat().st_size / 1e6
+                st.caption(f"Scored file: `{output_path.resolve()}` ({size_mb:.1f} MB)")
+                if size_mb <= settings.BULK_DOWNLOAD_MAX_MB:
+                    with open(output_path, "rb") as f:
+                        st.download_button("Download scored CSV", f, file_name=output_path.name, mime="text/csv")
+                else:
+                    st.info(f"Over {settings.BULK_DOWNLOAD_MAX_MB} MB, too large to send through the browser; "
+                            f"copy it from the path above.")
+
     with tab_system:
         st.subheader("Live System Logs")
         if Path("app.log").exists():
@@ -100,6 +150,33 @@ def run_admin():
                 open("app.log", 'w').close()
                 st.success("Logs cleared.")
         
+        st.markdown("---")
+        st.subheader("Input Drift vs. Training Data")
+        monitor = get_drift_monitor()
+        if monitor is None:
+            st.info("Drift monitor unavailable (reference data not found).")
+        else:
+            drift = monitor.scores()
+            st.caption(f"{drift['observations']:,} requests observed; scores over the last {drift['window']:,}. "
+                       f"PSI < {PSI_MODERATE} stable, {PSI_MODERATE}-{PSI_SIGNIFICANT} moderate, "
+                       f">= {PSI_SIGNIFICANT} significant drift.")
+            drift_df = pd.DataFrame(drift["features"])
+            st.dataframe(drift_df, use_container_width=True)
+            drifted = drift_df[drift_df["status"] == "significant"]["feature"].tolist()
+            if drifted:
+                st.warning(f"Significant drift in: {', '.join(drifted)}. Consider collecting field samples and retraining.")
+
+        st.markdown("---")
+        st.subheader("External Providers")
+        provider_stats = get_http_client().stats()
+        if provider_stats:
+            st.dataframe(pd.DataFrame(provider_stats), use_container_width=True)
+            down = [p["provider"] for p in provider_stats if p["circuit"] != "closed"]
+            if down:
+                st.warning(f"Circuit open for: {', '.join(down)}. Requests fall back to default values until it recovers.")
+        else:
+            st.info("No outbound calls made by this process yet.")
+
         st.markdown("---")
         st.subheader("AI Model Configuration")
         st.json(metadata if 'metadata' in locals() else {"status": "Metadata not found"})
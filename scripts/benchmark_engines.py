@@ -0,0 +1,88 @@
+import argparse
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import joblib
+import numpy as np
+import pandas as pd
+from modules.forest_engine import CompiledForest
+from modules.model_engines import ENGINES, available_engines
+from modules.training.pipeline import load_stage, prepare_stage, search_stage
+
+def pickled_size(model) -> int:
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.tell()
+
+def dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+def latency(predict, X: np.ndarray, batch_rows: int) -> dict:
+    single = []
+    for row in X[:200]:
+        t0 = time.perf_counter()
+        predict(row.reshape(1, -1))
+        single.append((time.perf_counter() - t0) * 1000)
+    batch = np.resize(X, (batch_rows, X.shape[1]))
+    t0 = time.perf_counter()
+    predict(batch)
+    return {
+        "p50_ms": round(float(np.percentile(single, 50)), 3),
+        "p99_ms": round(float(np.percentile(single, 99)), 3),
+        f"batch_{batch_rows}_ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Head-to-head comparison of the crop model engines.")
+    parser.add_argument("--data", nargs="+", default=["data/crop_recommendation.csv"])
+    parser.add_argument("--engines", default=",".join(available_engines()))
+    parser.add_argument("--search", choices=["none", "halving", "random"], default="none",
+                        help="Tune each engine first (default: engine defaults).")
+    parser.add_argument("--n-iter", type=int, default=20)
+    parser.add_argument("--batch-rows", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    prep = prepare_stage(load_stage(args.data), test_size=0.2, random_state=args.seed)
+    scaler = prep["scaler"]
+    X_test_raw = scaler.inverse_transform(prep["X_test"])
+    rows = []
+
+    for engine in args.engines.split(","):
+        if engine not in available_engines():
+            print(f"Skipping {engine}: not installed")
+            continue
+
+        t0 = time.perf_counter()
+        if args.search == "none":
+            model = ENGINES[engine].build(args.seed).fit(prep["X_train"], prep["y_train"])
+        else:
+            model = search_stage(prep, engine, args.search, args.n_iter, cv=4, random_state=args.seed)["model"]
+        train_s = time.perf_counter() - t0
+
+        accuracy = float(np.mean(model.predict(prep["X_test"]) == prep["y_test"]))
+        serve = lambda X, m=model: m.predict_proba(scaler.transform(X))
+        rows.append({"engine": engine, "serving": "sklearn + scaler", "accuracy": round(accuracy, 4),
+                     "train_s": round(train_s, 1), "artifact_kb": round(pickled_size(model) / 1024, 1),
+                     **latency(serve, X_test_raw, args.batch_rows)})
+
+        if ENGINES[engine].compiles:
+            forest = CompiledForest.from_sklearn(model).fold_scaler(scaler)
+            with tempfile.TemporaryDirectory() as tmp:
+                forest.save(tmp + "/forest")
+                size = dir_size(Path(tmp) / "forest")
+            accuracy = float(np.mean(forest.predict(X_test_raw) == model.classes_[prep["y_test"]]))
+            rows.append({"engine": engine, "serving": "compiled forest", "accuracy": round(accuracy, 4),
+                         "train_s": round(train_s, 1), "artifact_kb": round(size / 1024, 1),
+                         **latency(forest.predict_proba, X_test_raw, args.batch_rows)})
+
+    print(f"\n{len(prep['y_train'])} training rows / {len(prep['y_test'])} held-out rows\n")
+    print(pd.DataFrame(rows).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import joblib
+import numpy as np
+import pandas as pd
+from modules.core.config import settings
+from modules.forest_engine import CompiledForest
+
+FEATURES = ["N", "P", "K", "temperature", "humidity", "ph", "rainfall"]
+
+def sample_inputs(df: pd.DataFrame, n: int, seed: int = 42) -> np.ndarray:
+    """Draws n rows uniformly inside the per-feature range of the dataset."""
+    rng = np.random.default_rng(seed)
+    low, high = df[FEATURES].min().to_numpy(), df[FEATURES].max().to_numpy()
+    return rng.uniform(low, high, size=(n, len(FEATURES)))
+
+def check_parity(name: str, expected_model, expected_X: np.ndarray, forest: CompiledForest, X: np.ndarray):
+    expected = expected_model.predict_proba(expected_X)
+    actual = forest.predict_proba(X)
+    max_err = float(np.max(np.abs(expected - actual)))
+    label_match = float(np.mean(expected_model.classes_[expected.argmax(axis=1)] == forest.predict(X)))
+    print(f"[{name}] parity on {len(X)} rows: max |proba diff| = {max_err:.2e}, label agreement = {label_match:.4%}")
+    assert max_err < 1e-9, f"{name} probabilities diverge from sklearn"
+    assert label_match == 1.0, f"{name} labels diverge from sklearn"
+
+def check_explanations(forest: CompiledForest, X: np.ndarray):
+    """Path contributions must add up to the probability of the explained class."""
+    proba, bias, contributions = forest.explain(X)
+    chosen = proba[np.arange(len(X)), proba.argmax(axis=1)]
+    max_err = float(np.max(np.abs(bias + contributions.sum(axis=1) - chosen)))
+    print(f"[explain] additivity on {len(X)} rows: max |bias + sum(contrib) - proba| = {max_err:.2e}")
+    assert max_err < 1e-9, "contributions do not add up to the prediction"
+    assert np.array_equal(proba, forest.predict_proba(X)), "explain() probabilities differ from predict_proba()"
+
+def time_call(fn, X: np.ndarray, repeats: int) -> float:
+    fn(X)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(X)
+    return (time.perf_counter() - start) / repeats
+
+def time_load(label: str, fn, repeats: int = 5):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    print(f"{label:<32} {(time.perf_counter() - start) / repeats * 1000:>10.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Parity and latency check: sklearn vs compiled and raw-feature forests.")
+    parser.add_argument("--model", default=settings.MODEL_PATH)
+    parser.add_argument("--scaler", default=settings.SCALER_PATH)
+    parser.add_argument("--data", default="data/crop_recommendation.csv")
+    parser.add_argument("--artifact", default=settings.FOREST_PATH)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    scaler = joblib.load(args.scaler)
+    forest = CompiledForest.from_sklearn(model)
+    raw_forest = forest.fold_scaler(scaler)
+    df = pd.read_csv(args.data)
+
+    for raw in (df[FEATURES].to_numpy(dtype=float), sample_inputs(df, 20000)):
+        scaled = scaler.transform(raw)
+        check_parity("compiled", model, scaled, forest, scaled)
+        check_parity("raw-feature", model, scaled, raw_forest, raw)
+        check_explanations(raw_forest, raw)
+
+    if Path(args.artifact).exists():
+        print("\nCold load (warm page cache):")
+        time_load(f"joblib.load({Path(args.model).name})", lambda: joblib.load(args.model))
+        time_load("CompiledForest.load(mmap)", lambda: CompiledForest.load(args.artifact))
+        time_load("CompiledForest.load(copy)", lambda: CompiledForest.load(args.artifact, mmap=False))
+
+    print(f"\n{'batch':>8} | {'sklearn+scaler (ms)':>20} | {'compiled (ms)':>14} | {'raw-feature (ms)':>17}")
+    for batch, repeats in ((1, 50), (100, 20), (100_000, 1)):
+        raw = sample_inputs(df, batch, seed=batch)
+        t_sk = time_call(lambda X: model.predict_proba(scaler.transform(X)), raw, repeats) * 1000
+        t_cf = time_call(lambda X: forest.predict_proba(scaler.transform(X)), raw, repeats) * 1000
+        t_raw = time_call(raw_forest.predict_proba, raw, repeats) * 1000
+        print(f"{batch:>8} | {t_sk:>20.3f} | {t_cf:>14.3f} | {t_raw:>17.3f}")
+
+    raw = sample_inputs(df, 10_000, seed=7)
+    t_pred = time_call(raw_forest.predict_proba, raw, 3) * 1000
+    t_explain = time_call(raw_forest.explain, raw, 3) * 1000
+    print(f"\n10k rows: predict_proba {t_pred:.1f} ms, explain (proba + contributions) {t_explain:.1f} ms")
+
+if __name__ == "__main__":
+    main()
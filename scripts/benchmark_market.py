@@ -0,0 +1,112 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+from modules.market_advisor import MarketIndex
+
+STATES = ["Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh", "Goa", "Gujarat", "Haryana",
+          "Himachal Pradesh", "Jharkhand", "Karnataka", "Kerala", "Madhya Pradesh", "Maharashtra", "Manipur",
+          "Meghalaya", "Mizoram", "Nagaland", "Odisha", "Punjab", "Rajasthan", "Sikkim", "Tamil Nadu", "Telangana",
+          "Tripura", "Uttar Pradesh", "Uttarakhand", "West Bengal", "Delhi", "Jammu and Kashmir", "Ladakh",
+          "Puducherry", "Chandigarh", "Andaman and Nicobar", "Lakshadweep", "Dadra and Nagar Haveli"]
+BASE_COMMODITIES = ["Rice", "Wheat", "Maize", "Cotton", "Onion", "Potato", "Tomato", "Soyabean", "Groundnut",
+                    "Mustard", "Gram", "Arhar", "Moong", "Urad", "Jowar", "Bajra", "Sugarcane", "Turmeric",
+                    "Chilli", "Banana"]
+
+def synthetic_mandi(rows: int, commodities: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Mandi table in the mandi_prices.csv layout. Names are drawn from small
+    pools with untidy case and whitespace, as the raw data has; object
+    columns share the pooled strings, so 10M rows fit in a few GB.
+    """
+    rng = np.random.default_rng(seed)
+    names = [f"{BASE_COMMODITIES[i % len(BASE_COMMODITIES)]} {i // len(BASE_COMMODITIES)}" for i in range(commodities)]
+    commodity_pool = np.array([variant for name in names for variant in (name, name.upper(), f" {name} ")], dtype=object)
+    state_pool = np.array([variant for name in STATES for variant in (name, name.lower(), f"{name} ")], dtype=object)
+    dates = pd.date_range("2015-01-01", periods=3000).strftime("%Y-%m-%d").to_numpy(dtype=object)
+
+    modal = rng.integers(800, 9000, rows).astype(np.int32)
+    return pd.DataFrame({
+        "date": dates[np.sort(rng.integers(0, len(dates), rows))],
+        "state": state_pool[rng.integers(0, len(state_pool), rows)],
+        "district": np.array([f"District {i}" for i in range(50)], dtype=object)[rng.integers(0, 50, rows)],
+        "commodity": commodity_pool[rng.integers(0, len(commodity_pool), rows)],
+        "variety": np.array(["FAQ", "Local", "Other"], dtype=object)[rng.integers(0, 3, rows)],
+        "market": np.array([f"Market {i}" for i in range(200)], dtype=object)[rng.integers(0, 200, rows)],
+        "min_price": (modal * 0.9).astype(np.int32),
+        "max_price": (modal * 1.1).astype(np.int32),
+        "modal_price": modal,
+    })
+
+def legacy_query(df: pd.DataFrame, crop: str, state: str) -> pd.DataFrame:
+    """The filter MarketAdvisor ran on every rerun before the index, on a copy of the frame."""
+    df = df.copy()
+    df["commodity"] = df["commodity"].str.lower().str.strip()
+    df["state"] = df["state"].str.lower().str.strip()
+    search_crop, search_state = crop.lower().strip(), state.lower().strip()
+    filtered = df[(df["commodity"].str.contains(search_crop)) & (df["state"] == search_state)]
+    if filtered.empty:
+        filtered = df[df["commodity"].str.contains(search_crop)]
+    return filtered
+
+def check_parity(label: str, expected: pd.DataFrame, actual: pd.DataFrame):
+    columns = ["date", "commodity", "state", "market", "modal_price"]
+    same = (len(expected) == len(actual)
+            and expected[columns].astype(str).reset_index(drop=True).equals(actual[columns].astype(str).reset_index(drop=True)))
+    print(f"[{label}] parity: {len(actual)} rows, {'match' if same else 'MISMATCH'}")
+    assert same, f"{label}: index result differs from the legacy filter"
+
+def time_call(fn, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query cost of MarketIndex vs the legacy str.contains filter.")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--commodities", type=int, default=300)
+    parser.add_argument("--legacy-rows", type=int, default=1_000_000,
+                        help="Rows the legacy filter is timed and checked on; it copies the frame per query.")
+    parser.add_argument("--data", default="data/mandi_prices.csv")
+    args = parser.parse_args()
+
+    if Path(args.data).exists():
+        real = pd.read_csv(args.data)
+        index = MarketIndex(real)
+        for crop in real["commodity"].str.strip().unique()[:5]:
+            state = str(real["state"].iloc[0])
+            check_parity(f"{args.data} {crop}/{state}", legacy_query(real, crop, state), index.query(crop, state)[0])
+
+    start = time.perf_counter()
+    df = synthetic_mandi(args.rows, args.commodities)
+    print(f"\nSynthetic table: {len(df):,} rows, {df.memory_usage(deep=False).sum() / 1e9:.2f} GB (shallow), "
+          f"generated in {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    index = MarketIndex(df)
+    print(f"MarketIndex build: {time.perf_counter() - start:.2f} s, {len(index.pair_ranges)} (commodity, state) pairs")
+
+    queries = [
+        ("exact pair", "Rice 3", "Punjab"),
+        ("substring", "Wheat 1", "Bihar"),
+        ("national fallback", "Onion 2", "Nowhere"),
+    ]
+    subset = df.iloc[:args.legacy_rows]
+    subset_index = MarketIndex(subset)
+    for label, crop, state in queries:
+        check_parity(f"{label} @ {len(subset):,}", legacy_query(subset, crop, state), subset_index.query(crop, state)[0])
+
+    print(f"\n{'query':<20} | {'legacy @ ' + format(len(subset), ','):>18} | {'index @ ' + format(len(df), ','):>18} | rows")
+    for label, crop, state in queries:
+        legacy = time_call(lambda: legacy_query(subset, crop, state), repeats=1)
+        indexed = time_call(lambda: index.query(crop, state), repeats=20)
+        print(f"{label:<20} | {legacy * 1000:>15.1f} ms | {indexed * 1000:>15.3f} ms | {len(index.query(crop, state)[0]):,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.core.config import settings
+from modules.crop_envelopes import ENVELOPE_PERCENTILES, build_envelopes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Derive per-crop percentile envelopes from the training data.")
+    parser.add_argument("--data", default=settings.CROP_ENVELOPES_SOURCE)
+    parser.add_argument("--output", default=settings.CROP_ENVELOPES_PATH)
+    args = parser.parse_args()
+    envelopes = build_envelopes(args.data, args.output)
+    print(f"{len(envelopes.crops)} crops x {len(envelopes.features)} features x "
+          f"p{'/p'.join(map(str, ENVELOPE_PERCENTILES))} written to {args.output}")
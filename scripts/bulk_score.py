@@ -0,0 +1,28 @@
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.bulk_scoring import BulkScoringJob, count_rows
+from modules.core.config import settings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a soil-sample CSV with the serving crop model (resumable).")
+    parser.add_argument("input", help="CSV with N,P,K,temperature,humidity,ph,rainfall (or the schema names).")
+    parser.add_argument("--output", help="Scored CSV (default: <input>.scored.csv).")
+    parser.add_argument("--chunk-size", type=int, default=settings.BULK_CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=settings.BULK_WORKERS)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over.")
+    args = parser.parse_args()
+
+    output = args.output or str(Path(args.input).with_suffix(".scored.csv"))
+    total = count_rows(args.input)
+    job = BulkScoringJob(args.input, output, chunk_size=args.chunk_size, workers=args.workers, top_k=args.top_k)
+
+    def report(state):
+        print(f"\r{state['rows_done']}/{total} rows ({state['rows_done'] / max(total, 1):.0%})", end="", flush=True)
+
+    result = job.run(restart=args.restart, progress=report)
+    print(f"\nDone: {result['rows_done']} rows -> {output}")
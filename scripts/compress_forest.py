@@ -0,0 +1,134 @@
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from modules.core.config import settings
+from modules.forest_engine import CompiledForest
+
+FEATURES = ["N", "P", "K", "temperature", "humidity", "ph", "rainfall"]
+DTYPE_PRESETS = {
+    "float64": (np.float64, np.float64),
+    "float32": (np.float32, np.float32),
+    "float16": (np.float32, np.float16),
+}
+
+def load_holdout(data_path: str, classes: np.ndarray):
+    """Rebuilds the 80/20 stratified split used by Modelcode.py; returns raw features."""
+    df = pd.read_csv(data_path)
+    labels = sorted(df["label"].astype(str).unique())
+    y = np.searchsorted(labels, df["label"].astype(str))
+    X = df[FEATURES].fillna(df[FEATURES].median()).to_numpy(dtype=float)
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    return X_test, classes[y_test] if len(classes) == len(labels) else y_test
+
+def dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+def profile(label: str, predict_one, load, size_bytes: int, X: np.ndarray, y: np.ndarray, predict_batch) -> dict:
+    start = time.perf_counter()
+    for _ in range(5):
+        load()
+    load_ms = (time.perf_counter() - start) / 5 * 1000
+
+    timings = []
+    for row in X[:200]:
+        t0 = time.perf_counter()
+        predict_one(row.reshape(1, -1))
+        timings.append((time.perf_counter() - t0) * 1000)
+
+    return {
+        "model": label,
+        "size_kb": round(size_bytes / 1024, 1),
+        "load_ms": round(load_ms, 2),
+        "p50_ms": round(float(np.percentile(timings, 50)), 3),
+        "p99_ms": round(float(np.percentile(timings, 99)), 3),
+        "accuracy": round(float(np.mean(predict_batch(X) == y)), 4),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Search for the smallest forest within an accuracy budget.")
+    parser.add_argument("--model", default=settings.MODEL_PATH)
+    parser.add_argument("--scaler", default=settings.SCALER_PATH)
+    parser.add_argument("--data", default="data/crop_recommendation.csv")
+    parser.add_argument("--metadata", default="models/model_metadata.json")
+    parser.add_argument("--max-accuracy-loss", type=float, default=0.01,
+                        help="Largest accepted drop in held-out accuracy vs. the full forest.")
+    parser.add_argument("--metadata-floor", action="store_true",
+                        help="Also require the accuracy recorded in model_metadata.json.")
+    parser.add_argument("--trees", default="300,200,150,100,75,50,25,10")
+    parser.add_argument("--depths", default="",
+                        help="Comma-separated depth limits (default: full depth down to 3).")
+    parser.add_argument("--dtypes", default="float64,float32,float16")
+    parser.add_argument("--output", default="models/crop_forest_compact")
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    scaler = joblib.load(args.scaler)
+    full = CompiledForest.from_sklearn(model).fold_scaler(scaler)
+    X_test, y_test = load_holdout(args.data, full.classes_)
+
+    baseline = float(np.mean(full.predict(X_test) == y_test))
+    floor = baseline - args.max_accuracy_loss
+    if args.metadata_floor:
+        with open(args.metadata, "r") as f:
+            recorded = json.load(f)["training_metrics"]["accuracy"]
+        if baseline < recorded:
+            print(f"Warning: full forest scores {baseline:.4f} on the held-out split, "
+                  f"below the recorded {recorded:.4f}; no candidate can meet the metadata floor.")
+        floor = max(floor, recorded)
+    print(f"Held-out rows: {len(X_test)} | full forest accuracy: {baseline:.4f} | acceptance floor: {floor:.4f}\n")
+
+    tree_counts = [int(t) for t in args.trees.split(",") if int(t) <= full.n_trees]
+    depths = [int(d) for d in args.depths.split(",") if d] or list(range(full.max_depth, 2, -1))
+    candidates = []
+    for n_trees in tree_counts:
+        for depth in depths:
+            for dtype_name in args.dtypes.split(","):
+                threshold_dtype, value_dtype = DTYPE_PRESETS[dtype_name]
+                forest = full.compress(n_trees, depth, threshold_dtype, value_dtype)
+                accuracy = float(np.mean(forest.predict(X_test) == y_test))
+                candidates.append((forest.nbytes, accuracy, n_trees, depth, dtype_name, forest))
+
+    accepted = [c for c in candidates if c[1] >= floor]
+    print(f"Evaluated {len(candidates)} candidates, {len(accepted)} within budget.")
+    if not accepted:
+        print("No compressed forest meets the accuracy floor; keeping the current model.")
+        sys.exit(1)
+
+    nbytes, accuracy, n_trees, depth, dtype_name, best = min(accepted, key=lambda c: (c[0], -c[1]))
+    print(f"Selected: {n_trees} trees, depth {depth}, {dtype_name} -> {nbytes / 1024:.1f} KB in memory, "
+          f"accuracy {accuracy:.4f}\n")
+
+    output = Path(args.output)
+    best.save(str(output))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        full_dir = Path(tmp) / "full"
+        full.save(str(full_dir))
+        loaded_full = CompiledForest.load(str(full_dir))
+        loaded_best = CompiledForest.load(str(output))
+        rows = [
+            profile("sklearn pickle + scaler", lambda x: model.predict_proba(scaler.transform(x)),
+                    lambda: joblib.load(args.model), Path(args.model).stat().st_size, X_test, y_test,
+                    lambda X: model.classes_[model.predict_proba(scaler.transform(X)).argmax(axis=1)]),
+            profile("compiled (full)", loaded_full.predict_proba, lambda: CompiledForest.load(str(full_dir)),
+                    dir_size(full_dir), X_test, y_test, loaded_full.predict),
+            profile("compiled (compressed)", loaded_best.predict_proba, lambda: CompiledForest.load(str(output)),
+                    dir_size(output), X_test, y_test, loaded_best.predict),
+        ]
+
+    print(pd.DataFrame(rows).to_string(index=False))
+    print(f"\nCompressed forest written to {output}. "
+          f"Point FOREST_PATH at it (or copy it over {settings.FOREST_PATH}) to serve it.")
+
+if __name__ == "__main__":
+    main()
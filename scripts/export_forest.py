@@ -0,0 +1,28 @@
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import joblib
+from modules.core.config import settings
+from modules.forest_engine import CompiledForest
+
+def export_forest(model_path: str, scaler_path: str, output_path: str, fold_scaler: bool = True):
+    forest = CompiledForest.from_sklearn(joblib.load(model_path))
+    if fold_scaler:
+        forest = forest.fold_scaler(joblib.load(scaler_path))
+    forest.save(output_path)
+    space = "raw" if forest.scaler_folded else "scaled"
+    print(f"Exported {forest.n_trees} trees / {forest.n_nodes} nodes (max depth {forest.max_depth}, "
+          f"{space} inputs) to {output_path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flatten the crop RandomForest into NumPy node arrays.")
+    parser.add_argument("--model", default=settings.MODEL_PATH)
+    parser.add_argument("--scaler", default=settings.SCALER_PATH)
+    parser.add_argument("--output", default=settings.FOREST_PATH)
+    parser.add_argument("--keep-scaler", action="store_true",
+                        help="Export thresholds in scaled space instead of folding the scaler in.")
+    args = parser.parse_args()
+    export_forest(args.model, args.scaler, args.output, fold_scaler=not args.keep_scaler)
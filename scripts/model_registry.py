@@ -0,0 +1,51 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import joblib
+from modules.core.config import settings
+from modules.model_registry import ModelRegistry, load_legacy_labels
+
+def list_versions(registry: ModelRegistry):
+    active = registry.active_version()
+    versions = registry.versions()
+    if not versions:
+        print(f"No versions in {registry.root}")
+    for version in versions:
+        metadata = json.loads((registry.root / version / "metadata.json").read_text())
+        details = metadata.get("model_details", {})
+        accuracy = metadata.get("training_metrics", {}).get("accuracy", "-")
+        parent = metadata.get("incremental", {}).get("parent", "")
+        marker = "*" if version == active else " "
+        print(f"{marker} {version}  {details.get('algorithm', '-'):<32} accuracy={accuracy}"
+              f"{f'  grown from {parent}' if parent else ''}")
+
+def import_legacy(registry: ModelRegistry, activate: bool) -> str:
+    metadata = {}
+    if Path(settings.MODEL_METADATA_PATH).exists():
+        metadata = json.loads(Path(settings.MODEL_METADATA_PATH).read_text())
+    return registry.publish(joblib.load(settings.MODEL_PATH), joblib.load(settings.SCALER_PATH),
+                            load_legacy_labels(), metadata, activate=activate)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and roll out versions in the model registry.")
+    parser.add_argument("--registry", default=settings.MODEL_REGISTRY_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List versions; * marks the active one.")
+    activate_cmd = sub.add_parser("activate", help="Point ACTIVE at a version (rollback is the same command).")
+    activate_cmd.add_argument("version")
+    legacy_cmd = sub.add_parser("import-legacy", help=f"Publish {settings.MODEL_PATH} as a registry version.")
+    legacy_cmd.add_argument("--activate", action="store_true")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+    if args.command == "list":
+        list_versions(registry)
+    elif args.command == "activate":
+        registry.activate(args.version)
+        print(f"Active version: {args.version}")
+    else:
+        print(f"Published {import_legacy(registry, args.activate)}")
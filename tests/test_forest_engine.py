@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from modules.forest_engine import CompiledForest
+
+N_FEATURES = 7
+
+@pytest.fixture(scope="module")
+def fitted():
+    """Small forest on synthetic data with per-feature offsets and scales like the soil inputs."""
+    rng = np.random.default_rng(0)
+    offsets = np.array([50, 50, 50, 25, 70, 6.5, 150])
+    scales = np.array([30, 25, 40, 5, 15, 0.8, 60])
+    raw = rng.normal(size=(1500, N_FEATURES)) * scales + offsets
+    y = (raw[:, 0] > 50).astype(int) + 2 * (raw[:, 6] > 170) + (raw[:, 3] > 27)
+    scaler = StandardScaler().fit(raw)
+    model = RandomForestClassifier(n_estimators=25, random_state=0).fit(scaler.transform(raw), y)
+    test_raw = rng.normal(size=(800, N_FEATURES)) * scales + offsets
+    return model, scaler, test_raw
+
+def is_memory_mapped(array):
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = getattr(array, "base", None)
+    return False
+
+def assert_parity(expected_model, expected_X, forest, X):
+    expected = expected_model.predict_proba(expected_X)
+    np.testing.assert_allclose(forest.predict_proba(X), expected, rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(forest.predict(X), expected_model.predict(expected_X))
+
+def test_compiled_matches_sklearn(fitted):
+    model, scaler, raw = fitted
+    scaled = scaler.transform(raw)
+    assert_parity(model, scaled, CompiledForest.from_sklearn(model), scaled)
+
+def test_folded_scaler_takes_raw_features(fitted):
+    model, scaler, raw = fitted
+    folded = CompiledForest.from_sklearn(model).fold_scaler(scaler)
+    assert folded.scaler_folded
+    assert_parity(model, scaler.transform(raw), folded, raw)
+
+def test_fold_twice_is_rejected(fitted):
+    model, scaler, _ = fitted
+    with pytest.raises(ValueError):
+        CompiledForest.from_sklearn(model).fold_scaler(scaler).fold_scaler(scaler)
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_saved_forest_reloads_with_parity(fitted, tmp_path, mmap):
+    model, scaler, raw = fitted
+    folded = CompiledForest.from_sklearn(model).fold_scaler(scaler)
+    folded.save(str(tmp_path / "forest"))
+    loaded = CompiledForest.load(str(tmp_path / "forest"), mmap=mmap)
+    assert is_memory_mapped(loaded.threshold) == mmap
+    assert loaded.fingerprint == folded.fingerprint
+    assert_parity(model, scaler.transform(raw), loaded, raw)
+
+def test_explain_contributions_add_up(fitted):
+    model, scaler, raw = fitted
+    forest = CompiledForest.from_sklearn(model).fold_scaler(scaler)
+    proba, bias, contributions = forest.explain(raw)
+    np.testing.assert_array_equal(proba, forest.predict_proba(raw))
+    chosen = proba[np.arange(len(raw)), proba.argmax(axis=1)]
+    np.testing.assert_allclose(bias + contributions.sum(axis=1), chosen, atol=1e-9)
+
+    other = np.zeros(len(raw), dtype=int)
+    proba, bias, contributions = forest.explain(raw, class_index=other)
+    np.testing.assert_allclose(bias + contributions.sum(axis=1), proba[:, 0], atol=1e-9)
+
+def test_nan_inputs_follow_sklearn_missing_value_routing(fitted):
+    model, scaler, raw = fitted
+    raw = raw.copy()
+    raw[::3, 0] = np.nan
+    raw[1::4, 6] = np.nan
+    scaled = scaler.transform(raw)
+    forest = CompiledForest.from_sklearn(model)
+    assert_parity(model, scaled, forest, scaled)
+    assert_parity(model, scaled, forest.fold_scaler(scaler), raw)
+
+    proba, bias, contributions = forest.explain(scaled)
+    chosen = proba[np.arange(len(raw)), proba.argmax(axis=1)]
+    np.testing.assert_allclose(bias + contributions.sum(axis=1), chosen, atol=1e-9)
+
+def test_compress_keeps_missing_value_routing(fitted):
+    model, scaler, raw = fitted
+    raw = raw.copy()
+    raw[::2, 0] = np.nan
+    forest = CompiledForest.from_sklearn(model).fold_scaler(scaler)
+    compact = forest.compress(threshold_dtype=np.float64, value_dtype=np.float64)
+    np.testing.assert_allclose(compact.predict_proba(raw), forest.predict_proba(raw), atol=1e-12)